@@ -1,12 +1,35 @@
 """BigQuery client factory."""
 
 import os
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 
 from google.api_core import client_options
+from google.api_core.exceptions import NotFound
 from google.cloud import bigquery
 
 from config import Config
 
+# Clients are cached per (project_id, local_mode) so repeated dispatches reuse the
+# same transport (auth, connection pool) instead of rebuilding it on every call.
+_clients: dict[tuple[str, bool], bigquery.Client] = {}
+_clients_lock = threading.Lock()
+
+# Table existence is cached per (client, table) for a few minutes: pipeline tables are
+# stable across events, so repeated get_table probes are just wasted metadata RPCs.
+# Missing tables are cached for a shorter time so newly created tables are seen quickly.
+TABLE_EXISTS_CACHE_TTL_SECONDS = 300.0
+TABLE_NOT_FOUND_CACHE_TTL_SECONDS = 60.0
+TABLE_EXISTS_CACHE_MAX_SIZE = 256
+_table_exists_cache: dict[tuple[int, str], tuple[bool, float]] = {}
+_table_exists_lock = threading.Lock()
+
+# Shared pool for running independent metadata probes concurrently. Threads are only
+# started on first use, which happens after the worker process has forked.
+_probe_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bq-table-probe")
+
 
 def _create_local_client(project_id: str) -> bigquery.Client:
     """Create a BigQuery client configured for local emulator."""
@@ -31,15 +54,286 @@ def create_bigquery_client(config: Config) -> bigquery.Client:
     """
     Create a BigQuery client appropriate for the current mode.
 
+    Clients are cached per (project_id, local_mode), so calling this repeatedly
+    with an equivalent configuration returns the same client instance.
+
     Args:
         config: Application configuration
 
     Returns:
         Configured BigQuery client instance
     """
-    if config.local_mode:
-        return _create_local_client(config.bigquery_project_id)
-    return _create_cloud_client(config.bigquery_project_id)
+    key = (config.bigquery_project_id, config.local_mode)
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            if config.local_mode:
+                client = _create_local_client(config.bigquery_project_id)
+            else:
+                client = _create_cloud_client(config.bigquery_project_id)
+            _clients[key] = client
+
+    return client
+
+
+def close_clients() -> None:
+    """Close and forget all cached BigQuery clients."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def table_exists(client: bigquery.Client, table_ref: str) -> bool:
+    """
+    Check whether a BigQuery table exists, caching the result.
+
+    Existing tables are remembered for TABLE_EXISTS_CACHE_TTL_SECONDS and missing ones
+    for TABLE_NOT_FOUND_CACHE_TTL_SECONDS, so repeated checks for the same table skip
+    the get_table RPC.
+
+    Args:
+        client: BigQuery client used for the lookup
+        table_ref: Fully-qualified table reference
+
+    Returns:
+        True if the table exists, False if BigQuery reports it as not found
+    """
+    key = (id(client), table_ref)
+    now = time.monotonic()
+
+    with _table_exists_lock:
+        cached = _table_exists_cache.get(key)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    try:
+        client.get_table(table_ref)
+        exists = True
+        ttl = TABLE_EXISTS_CACHE_TTL_SECONDS
+    except NotFound:
+        exists = False
+        ttl = TABLE_NOT_FOUND_CACHE_TTL_SECONDS
+
+    with _table_exists_lock:
+        _table_exists_cache.pop(key, None)
+        if len(_table_exists_cache) >= TABLE_EXISTS_CACHE_MAX_SIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            del _table_exists_cache[next(iter(_table_exists_cache))]
+        _table_exists_cache[key] = (exists, now + ttl)
+    return exists
+
+
+def tables_exist(client: bigquery.Client, table_refs: Sequence[str]) -> list[bool]:
+    """
+    Check whether several BigQuery tables exist, probing them concurrently.
+
+    Each table is checked with `table_exists`, so cached results are reused and only
+    uncached tables cost a get_table RPC; those RPCs overlap instead of running serially.
+
+    Args:
+        client: BigQuery client used for the lookups
+        table_refs: Fully-qualified table references
+
+    Returns:
+        Existence flags in the same order as table_refs
+    """
+    if len(table_refs) <= 1:
+        return [table_exists(client, table_ref) for table_ref in table_refs]
+
+    futures = [_probe_executor.submit(table_exists, client, table_ref) for table_ref in table_refs]
+    return [future.result() for future in futures]
+
+
+def forget_tables(client: bigquery.Client, *table_refs: str) -> None:
+    """
+    Drop cached existence results for the given tables.
+
+    Used when a query reports a table as missing despite a cached positive result, or
+    when a table is known to have just been created.
+
+    Args:
+        client: BigQuery client the results were cached for
+        table_refs: Fully-qualified table references
+    """
+    with _table_exists_lock:
+        for table_ref in table_refs:
+            _table_exists_cache.pop((id(client), table_ref), None)
+
+
+class MissingTablesError(Exception):
+    """Exception raised when tables a query requires do not exist."""
+
+    def __init__(self, table_refs: Sequence[str]):
+        self.table_refs = list(table_refs)
+        super().__init__(f"Tables not found: {', '.join(self.table_refs)}")
+
+
+def query_if_tables_exist(
+    client: bigquery.Client,
+    query: str,
+    *,
+    required_tables: Sequence[str],
+    optional_tables: Sequence[str] = (),
+    job_config: bigquery.QueryJobConfig | None = None,
+    max_results: int | None = None,
+) -> bigquery.table.RowIterator | None:
+    """
+    Run a query once the tables it reads are known to exist.
+
+    All tables are probed concurrently first, since the emulator hangs on queries that
+    read missing tables. If the query still reports a table as missing, a cached
+    existence result was stale: the tables are forgotten and probed again, so the
+    outcome names the table that is actually gone.
+
+    Args:
+        client: BigQuery client
+        query: SQL reading required_tables and optional_tables
+        required_tables: Fully-qualified tables that must exist
+        optional_tables: Fully-qualified tables without which the query is skipped
+        job_config: Optional query job configuration
+        max_results: Optional maximum number of rows to fetch
+
+    Returns:
+        The query result, or None if any optional table doesn't exist
+
+    Raises:
+        MissingTablesError: If any required table doesn't exist
+        NotFound: If the query still reports a missing table after probing again
+    """
+    try:
+        return _query_probed_tables(
+            client, query, required_tables, optional_tables, job_config, max_results
+        )
+    except NotFound:
+        # A cached existence result was stale; drop the tables' entries and probe again
+        forget_tables(client, *required_tables, *optional_tables)
+        return _query_probed_tables(
+            client, query, required_tables, optional_tables, job_config, max_results
+        )
+
+
+def _query_probed_tables(
+    client: bigquery.Client,
+    query: str,
+    required_tables: Sequence[str],
+    optional_tables: Sequence[str],
+    job_config: bigquery.QueryJobConfig | None,
+    max_results: int | None,
+) -> bigquery.table.RowIterator | None:
+    exists = tables_exist(client, [*required_tables, *optional_tables])
+    required_exist = exists[: len(required_tables)]
+    missing_required = [
+        table_ref
+        for table_ref, found in zip(required_tables, required_exist, strict=True)
+        if not found
+    ]
+    if missing_required:
+        raise MissingTablesError(missing_required)
+    if not all(exists):
+        return None
+
+    # query_and_wait uses jobs.query, which returns short results without the
+    # separate job creation and polling round-trips of query().result()
+    return client.query_and_wait(query, job_config=job_config, max_results=max_results)
+
+
+def sum_vl_pago_by_source(
+    client: bigquery.Client,
+    unprocessable_table: str,
+    processable_table: str,
+) -> tuple[float | None, float | None]:
+    """
+    Sum vl_pago over the unprocessable and processable claims tables in one scan.
+
+    Both tables are read through a single UNION ALL query, with each row tagged by
+    its source so conditional aggregation can split the sums. The pre-filtered and
+    processable handlers share this function, so for the same pipeline run they send
+    identical SQL and BigQuery's query cache answers the second one without a scan.
+
+    Args:
+        client: BigQuery client
+        unprocessable_table: Fully-qualified unprocessable claims table
+        processable_table: Fully-qualified processable claims table
+
+    Returns:
+        The (unprocessable, processable) sums, with None for a table that doesn't exist
+    """
+    try:
+        return _sum_vl_pago_of_existing_tables(client, unprocessable_table, processable_table)
+    except MissingTablesError:
+        # A cached existence result was stale and query_if_tables_exist has refreshed
+        # it, so building the query again leaves the dropped table out
+        return _sum_vl_pago_of_existing_tables(client, unprocessable_table, processable_table)
+
+
+def _sum_vl_pago_of_existing_tables(
+    client: bigquery.Client,
+    unprocessable_table: str,
+    processable_table: str,
+) -> tuple[float | None, float | None]:
+    # Existence results are cached across events
+    unprocessable_exists, processable_exists = tables_exist(
+        client, [unprocessable_table, processable_table]
+    )
+
+    # A missing table is left out of the union, so it contributes no rows
+    source_selects = []
+    existing_tables = []
+    if unprocessable_exists:
+        source_selects.append(f"SELECT 'u' AS src, vl_pago FROM `{unprocessable_table}`")
+        existing_tables.append(unprocessable_table)
+    if processable_exists:
+        source_selects.append(f"SELECT 'p' AS src, vl_pago FROM `{processable_table}`")
+        existing_tables.append(processable_table)
+
+    sum_unprocessable_vl_pago = 0.0
+    sum_processable_vl_pago = 0.0
+    if source_selects:
+        union_sources = "\n        UNION ALL\n        ".join(source_selects)
+        sums_query = f"""
+        SELECT
+            COALESCE(SUM(CASE WHEN src = 'u' THEN vl_pago ELSE 0 END), 0)
+                AS sum_unprocessable_vl_pago,
+            COALESCE(SUM(CASE WHEN src = 'p' THEN vl_pago ELSE 0 END), 0)
+                AS sum_processable_vl_pago
+        FROM (
+        {union_sources}
+        )
+        """
+        # The result is a single row read straight from the jobs.query response;
+        # iterating it never opens a BigQuery Storage read session
+        result = query_if_tables_exist(
+            client, sums_query, required_tables=existing_tables, max_results=1
+        )
+        # Without optional tables the result is never None. An aggregate without
+        # GROUP BY always returns exactly one row, and COALESCE keeps both sums
+        # non-null; float() only converts NUMERIC columns' Decimals
+        for row in result or ():
+            sum_unprocessable_vl_pago = float(row.sum_unprocessable_vl_pago)
+            sum_processable_vl_pago = float(row.sum_processable_vl_pago)
+
+    return (
+        sum_unprocessable_vl_pago if unprocessable_exists else None,
+        sum_processable_vl_pago if processable_exists else None,
+    )
+
+
+def clear_table_exists_cache() -> None:
+    """Drop all cached table existence results."""
+    with _table_exists_lock:
+        _table_exists_cache.clear()
 
 
-__all__ = ["create_bigquery_client"]
+__all__ = [
+    "create_bigquery_client",
+    "close_clients",
+    "table_exists",
+    "tables_exist",
+    "forget_tables",
+    "MissingTablesError",
+    "query_if_tables_exist",
+    "sum_vl_pago_by_source",
+    "clear_table_exists_cache",
+]
@@ -1,7 +1,7 @@
 """Application configuration."""
 
+import functools
 import logging
-from typing import Any
 
 from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -17,6 +17,8 @@ class Config(BaseSettings):
     - MAGEAI_MONITORING_LOCAL_MODE or LOCAL_MODE (default: true if not set)
     - MAGEAI_MONITORING_CLOUD_RUN_PROJECT_ID or CLOUD_RUN_PROJECT_ID (default: "local-project")
     - MAGEAI_MONITORING_BIGQUERY_PROJECT_ID or BIGQUERY_PROJECT_ID (default: "test-project")
+    - MAGEAI_MONITORING_HISTORICAL_PARTITION_COLUMN or HISTORICAL_PARTITION_COLUMN
+      (default: unset, no extra partition filter on historical tables)
     """
 
     cloud_run_project_id: str = Field(
@@ -31,6 +33,12 @@ class Config(BaseSettings):
             "MAGEAI_MONITORING_BIGQUERY_PROJECT_ID", "BIGQUERY_PROJECT_ID"
         ),
     )
+    historical_partition_column: str | None = Field(
+        default=None,
+        validation_alias=AliasChoices(
+            "MAGEAI_MONITORING_HISTORICAL_PARTITION_COLUMN", "HISTORICAL_PARTITION_COLUMN"
+        ),
+    )
     local_mode: bool = Field(
         default=True,
         validation_alias=AliasChoices(
@@ -47,15 +55,37 @@ class Config(BaseSettings):
         cli_parse_args=False,
     )
 
-    def __init__(self, **kwargs: Any):
-        """Initialize config and log configuration."""
-        super().__init__(**kwargs)
+    def log_once(self) -> None:
+        """Log the active configuration, only the first time it is called per process."""
+        global _logged
+
+        if _logged:
+            return
+        _logged = True
 
-        # Log configuration
         mode_name = "LOCAL" if self.local_mode else "PRODUCTION"
         logging.info(f"Running in {mode_name} mode")
         logging.info(f"CLOUD_RUN_PROJECT_ID: {self.cloud_run_project_id}")
         logging.info(f"BIGQUERY_PROJECT_ID: {self.bigquery_project_id}")
 
 
-__all__ = ["Config"]
+_logged = False
+
+
+@functools.lru_cache(maxsize=1)
+def get_config() -> Config:
+    """
+    Get the process-wide configuration.
+
+    The configuration is loaded from the environment and logged on first use;
+    subsequent calls return the same instance.
+
+    Returns:
+        Application configuration
+    """
+    config = Config()
+    config.log_once()
+    return config
+
+
+__all__ = ["Config", "get_config"]
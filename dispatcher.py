@@ -1,16 +1,29 @@
 """Handler dispatcher for routing events to appropriate handlers."""
 
 import base64
-import json
 import logging
+from collections.abc import Callable, Sequence
 from datetime import UTC, datetime
 
+import orjson
 from cloudevents.http import CloudEvent
 from flask import Response, make_response
 from google.cloud import monitoring_v3
 
 from handlers.base import Handler, HandlerBadRequestError
-from metrics import emit_gauge_metric
+from metrics import build_gauge_time_series, emit_time_series
+
+
+class _LazyJSON:
+    """Log argument that serializes its value to JSON only when formatted."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: object):
+        self.value = value
+
+    def __str__(self) -> str:
+        return orjson.dumps(self.value, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
 
 
 def decode_message(cloud_event: CloudEvent) -> dict | None:
@@ -27,26 +40,29 @@ def decode_message(cloud_event: CloudEvent) -> dict | None:
     Returns:
         Decoded message as a dictionary, or None if decoding fails
     """
-    data = cloud_event.data
-
-    # Check for base64-encoded message format (Pub/Sub style)
-    message = data.get("message", {})
-    encoded_data = message.get("data")
-
-    if encoded_data:
-        try:
-            decoded = base64.b64decode(encoded_data).decode("utf-8")
-            return json.loads(decoded)
-        except (ValueError, json.JSONDecodeError, UnicodeDecodeError) as e:
-            logging.error(f"Failed to decode base64 message: {e}")
+    match cloud_event.data:
+        # Base64-encoded message format (Pub/Sub style)
+        case {"message": {"data": encoded_data}} if encoded_data:
+            try:
+                # orjson parses the decoded bytes directly, validating UTF-8 in the same pass
+                decoded = orjson.loads(base64.b64decode(encoded_data))
+            except ValueError as e:
+                # orjson.JSONDecodeError and binascii.Error are both ValueError subclasses
+                logging.error(f"Failed to decode base64 message: {e}")
+                return None
+            return decoded if isinstance(decoded, dict) else None
+
+        # Direct payload format (wrangling events)
+        case {"payload": _, "source_timestamp": _} as data if isinstance(data, dict):
+            return data
+
+        # If neither format matches, return None
+        case _:
             return None
 
-    # Check for direct payload format (wrangling events)
-    if "payload" in data and "source_timestamp" in data:
-        return data
 
-    # If neither format matches, return None
-    return None
+# (handler class name, bound match method, bound handle method)
+_HandlerEntry = tuple[str, Callable[[dict], bool], Callable[[dict], None]]
 
 
 class HandlerDispatcher:
@@ -70,6 +86,47 @@ class HandlerDispatcher:
         self.monitoring_client = monitoring_client
         self.project_id = project_id
 
+        # Resolve each handler's class name, bound match/handle methods and match key once,
+        # so dispatch only needs a dict lookup to find the candidates for an event and no
+        # per-event attribute lookups to run them. Candidate lists keep registration order.
+        entries = [
+            (handler.match_key(), (handler.__class__.__name__, handler.match, handler.handle))
+            for handler in handlers
+        ]
+        self._unkeyed_entries: Sequence[_HandlerEntry] = [
+            entry for key, entry in entries if key is None
+        ]
+        self._entries_by_key: dict[tuple[object, object], Sequence[_HandlerEntry]] = {
+            key: [entry for entry_key, entry in entries if entry_key is None or entry_key == key]
+            for key, _ in entries
+            if key is not None
+        }
+
+    def _candidate_entries(self, decoded_message: dict) -> Sequence[_HandlerEntry]:
+        """
+        Get the entries of the handlers that may match the decoded message.
+
+        Args:
+            decoded_message: The decoded message dictionary
+
+        Returns:
+            (class name, match, handle) entries of the handlers whose match key equals the
+            event's (pipeline_uuid, status), plus those of all handlers without a match key,
+            in registration order
+        """
+        payload = decoded_message.get("payload")
+        if not isinstance(payload, dict):
+            return self._unkeyed_entries
+
+        # Only string values can equal a match key; anything else (e.g. a list, which is
+        # unhashable) can only be claimed by handlers without a match key
+        pipeline_uuid = payload.get("pipeline_uuid")
+        status = payload.get("status")
+        if not (isinstance(pipeline_uuid, str) and isinstance(status, str)):
+            return self._unkeyed_entries
+
+        return self._entries_by_key.get((pipeline_uuid, status), self._unkeyed_entries)
+
     def dispatch(self, cloud_event: CloudEvent) -> Response:
         """
         Dispatch event to all matching handlers.
@@ -95,42 +152,41 @@ class HandlerDispatcher:
             logging.error("Failed to decode message from CloudEvent")
             return make_response(("Bad Request: Invalid message format", 400))
 
-        # Log the decoded message
-        logging.info(f"Decoded message: {json.dumps(decoded_message, default=str)}")
+        # Log the decoded message (serialized only if the record is actually emitted)
+        logging.info("Decoded message: %s", _LazyJSON(decoded_message))
 
         # Accumulate errors from matchers
         matcher_errors = []
         matched_handlers = []
-        for handler in self.handlers:
+        for handler_class, match, handle in self._candidate_entries(decoded_message):
             try:
-                if handler.match(decoded_message):
-                    matched_handlers.append(handler)
+                if match(decoded_message):
+                    matched_handlers.append((handler_class, handle))
             except Exception as e:
                 # Accumulate matcher error instead of returning immediately
-                handler_class = handler.__class__.__name__
                 logging.error(f"Handler {handler_class} match() failed: {e}", exc_info=True)
                 matcher_errors.append((handler_class, e))
 
         # Accumulate errors from handlers
-        handler_errors = []
-        for handler in matched_handlers:
+        handler_errors: list[tuple[str, Exception, str]] = []
+        for handler_class, handle in matched_handlers:
             try:
-                handler.handle(decoded_message)
+                handle(decoded_message)
             except HandlerBadRequestError as e:
                 # Accumulate BadRequestError
-                handler_class = handler.__class__.__name__
                 logging.error(f"Handler {handler_class} raised BadRequestError: {e.message}")
                 handler_errors.append((handler_class, e, "bad_request"))
             except Exception as e:
                 # Accumulate other exceptions
-                handler_class = handler.__class__.__name__
                 logging.error(f"Handler {handler_class} failed: {e}", exc_info=True)
                 handler_errors.append((handler_class, e, "internal_error"))
 
-        # Emit metrics for all failures
+        # Emit metrics for all failures in a single CreateTimeSeries request.
+        # A request must not contain the same series twice, so failures are keyed by
+        # (metric name, handler class).
+        failure_series = {}
         for handler_class, error in matcher_errors:
-            emit_gauge_metric(
-                monitoring_client=self.monitoring_client,
+            failure_series[("handler_matcher_failure", handler_class)] = build_gauge_time_series(
                 project_id=self.project_id,
                 name="handler_matcher_failure",
                 value=1.0,
@@ -139,8 +195,7 @@ class HandlerDispatcher:
             )
 
         for handler_class, error, error_type in handler_errors:
-            emit_gauge_metric(
-                monitoring_client=self.monitoring_client,
+            failure_series[("handler_execution_failure", handler_class)] = build_gauge_time_series(
                 project_id=self.project_id,
                 name="handler_execution_failure",
                 value=1.0,
@@ -148,6 +203,13 @@ class HandlerDispatcher:
                 timestamp=timestamp,
             )
 
+        if failure_series:
+            emit_time_series(
+                monitoring_client=self.monitoring_client,
+                project_id=self.project_id,
+                time_series=list(failure_series.values()),
+            )
+
         # Determine response based on accumulated errors
         # If there's any matcher error, respond with 500
         if matcher_errors:
@@ -158,7 +220,7 @@ class HandlerDispatcher:
             bad_request_errors = [
                 (handler_class, error)
                 for handler_class, error, et in handler_errors
-                if et == "bad_request"
+                if et == "bad_request" and isinstance(error, HandlerBadRequestError)
             ]
             if bad_request_errors:
                 # Return the first bad request error message
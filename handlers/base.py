@@ -1,6 +1,9 @@
 """Base handler class and custom exceptions."""
 
+import functools
 from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import ClassVar
 
 
 class HandlerBadRequestError(Exception):
@@ -11,9 +14,75 @@ class HandlerBadRequestError(Exception):
         super().__init__(message)
 
 
+def require_variables(variables: dict, *names: str) -> list:
+    """
+    Look up required pipeline variables, failing once for all missing ones.
+
+    Args:
+        variables: The "variables" dictionary of the event payload
+        *names: Names of the required variables
+
+    Returns:
+        The variable values, in the same order as names
+
+    Raises:
+        HandlerBadRequestError: If any of the variables is missing or empty
+    """
+    values = [variables.get(name) for name in names]
+    missing = [f"'{name}'" for name, value in zip(names, values, strict=True) if not value]
+
+    if len(missing) == 1:
+        raise HandlerBadRequestError(f"No variable {missing[0]} found in payload.")
+    if missing:
+        raise HandlerBadRequestError(f"No variables {', '.join(missing)} found in payload.")
+
+    return values
+
+
+def ensure_full_table_ref(table: str, project_id: str) -> str:
+    """
+    Qualify a table reference with a project unless it already has one.
+
+    Args:
+        table: Table reference, either "dataset.table" or "project.dataset.table"
+        project_id: Project ID to prepend when the reference has no project
+
+    Returns:
+        The fully-qualified table reference
+    """
+    return table if "." in table else f"{project_id}.{table}"
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_timestamp(value: str) -> datetime:
+    # datetime is immutable, so every handler of an event can share the parsed value
+    return datetime.fromisoformat(value)
+
+
+def parse_source_timestamp(decoded_message: dict) -> datetime:
+    """
+    Parse the event's ISO 8601 source_timestamp.
+
+    datetime.fromisoformat accepts the "Z" UTC suffix natively since Python 3.11.
+    Results are cached by the raw string, so handlers matching the same event
+    parse it only once.
+
+    Args:
+        decoded_message: The decoded message dictionary containing "source_timestamp"
+
+    Returns:
+        The source timestamp as a datetime
+    """
+    return _parse_timestamp(decoded_message["source_timestamp"])
+
+
 class Handler(ABC):
     """Base class for all event handlers."""
 
+    # (pipeline_uuid, status) of the events the handler matches, or None if it is not
+    # keyed; handlers should compare against it in `match` so the two cannot drift apart
+    MATCH_KEY: ClassVar[tuple[str, str] | None] = None
+
     @abstractmethod
     def match(self, decoded_message: dict) -> bool:
         """
@@ -27,6 +96,19 @@ class Handler(ABC):
         """
         pass
 
+    def match_key(self) -> tuple[str, str] | None:
+        """
+        Return the (pipeline_uuid, status) pair of the events this handler matches.
+
+        The dispatcher uses this key to skip handlers whose key differs from the
+        event's without calling `match`. Handlers that may match events with any
+        key return None, so `match` is always called for them.
+
+        Returns:
+            The (pipeline_uuid, status) pair, or None if the handler is not keyed
+        """
+        return self.MATCH_KEY
+
     @abstractmethod
     def handle(self, decoded_message: dict) -> None:
         """
@@ -4,12 +4,19 @@ This module contains the base class for handlers that calculate and emit
 new beneficiaries metrics from pipeline completion events.
 """
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-from google.api_core.exceptions import NotFound
 from google.cloud import bigquery, monitoring_v3
-
-from handlers.base import Handler, HandlerBadRequestError
+from google.cloud.bigquery import QueryJobConfig, ScalarQueryParameter
+
+from bigquery import MissingTablesError, query_if_tables_exist
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+    require_variables,
+)
 from metrics import emit_gauge_metric
 
 
@@ -84,50 +91,42 @@ class BeneficiariesVolumeRatioBaseHandler(Handler):
 
         variables = payload.get("variables", {})
 
-        batch_processable_table = variables.get(batch_processable_table_var)
-        batch_unprocessable_table = variables.get(batch_unprocessable_table_var)
-        historical_processable_table = variables.get(historical_processable_table_var)
-        historical_unprocessable_table = variables.get(historical_unprocessable_table_var)
-
-        if not batch_processable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{batch_processable_table_var}' found in payload."
-            )
-
-        if not batch_unprocessable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{batch_unprocessable_table_var}' found in payload."
-            )
-
-        if not historical_processable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{historical_processable_table_var}' found in payload."
-            )
-
-        if not historical_unprocessable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{historical_unprocessable_table_var}' found in payload."
-            )
+        (
+            batch_processable_table,
+            batch_unprocessable_table,
+            historical_processable_table,
+            historical_unprocessable_table,
+        ) = require_variables(
+            variables,
+            batch_processable_table_var,
+            batch_unprocessable_table_var,
+            historical_processable_table_var,
+            historical_unprocessable_table_var,
+        )
 
         # Ensure fully-qualified table paths
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
-        full_batch_processable_table = ensure_full_table_ref(batch_processable_table)
-        full_batch_unprocessable_table = ensure_full_table_ref(batch_unprocessable_table)
-        full_historical_processable_table = ensure_full_table_ref(historical_processable_table)
-        full_historical_unprocessable_table = ensure_full_table_ref(historical_unprocessable_table)
+        full_batch_processable_table = ensure_full_table_ref(
+            batch_processable_table, self.data_project_id
+        )
+        full_batch_unprocessable_table = ensure_full_table_ref(
+            batch_unprocessable_table, self.data_project_id
+        )
+        full_historical_processable_table = ensure_full_table_ref(
+            historical_processable_table, self.data_project_id
+        )
+        full_historical_unprocessable_table = ensure_full_table_ref(
+            historical_unprocessable_table, self.data_project_id
+        )
 
         # Parse timestamp for 3-month window calculation
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
         one_month_ago = source_timestamp - timedelta(days=30)
         two_months_ago = source_timestamp - timedelta(days=60)
         # Format as date only (YYYY-MM-DD) for simple comparison
-        # This works directly with DATETIME and TIMESTAMP columns in BigQuery and emulator
-        one_month_ago_date = one_month_ago.strftime("%Y-%m-%d")
-        two_months_ago_date = two_months_ago.strftime("%Y-%m-%d")
+        # Bound as STRING parameters, which BigQuery coerces to the column type like a
+        # literal, so this works with DATETIME and TIMESTAMP columns in BigQuery and emulator
+        one_month_ago_date = one_month_ago.date().isoformat()
+        two_months_ago_date = two_months_ago.date().isoformat()
 
         # Build base labels
         partner_value = variables.get("partner")
@@ -138,46 +137,35 @@ class BeneficiariesVolumeRatioBaseHandler(Handler):
             "approved": approved_value,
         }
 
-        # Query to calculate new beneficiaries percentage
-        # This query is compatible with both BigQuery and BigQuery emulator (SQLite)
-        # Excludes batch items from historical lookup to avoid counting them as existing
-        new_beneficiaries_query = f"""
-        WITH latest_beneficiaries AS (
-            SELECT id_matricula
+        # Query to calculate beneficiaries volume ratio
+        # Reads each table once: every row is tagged with its window (batch rows and
+        # historical rows from the last month are "latest", the month before is
+        # "previous"), and both exact distinct counts come from one aggregation
+        beneficiaries_volume_ratio_query = f"""
+        WITH beneficiary_rows AS (
+            SELECT id_matricula, TRUE AS is_latest
             FROM `{full_batch_processable_table}`
             WHERE id_matricula IS NOT NULL
-            UNION DISTINCT
-            SELECT id_matricula
+            UNION ALL
+            SELECT id_matricula, TRUE AS is_latest
             FROM `{full_batch_unprocessable_table}`
             WHERE id_matricula IS NOT NULL
-            UNION DISTINCT
-            SELECT id_matricula
-            FROM `{full_historical_processable_table}` h1
-            WHERE created_at >= '{one_month_ago_date}'
+            UNION ALL
+            SELECT id_matricula, created_at >= @one_month_ago AS is_latest
+            FROM `{full_historical_processable_table}`
+            WHERE created_at >= @two_months_ago
                 AND id_matricula IS NOT NULL
-            UNION DISTINCT
-            SELECT id_matricula
-            FROM `{full_historical_unprocessable_table}` h1
-            WHERE created_at >= '{one_month_ago_date}'
-                AND id_matricula IS NOT NULL
-        ),
-        previous_beneficiaries AS (
-            SELECT id_matricula
-            FROM `{full_historical_processable_table}` h1
-            WHERE created_at >= '{two_months_ago_date}'
-                AND created_at < '{one_month_ago_date}'
-                AND id_matricula IS NOT NULL
-            UNION DISTINCT
-            SELECT id_matricula
-            FROM `{full_historical_unprocessable_table}` h1
-            WHERE created_at >= '{two_months_ago_date}'
-                AND created_at < '{one_month_ago_date}'
+            UNION ALL
+            SELECT id_matricula, created_at >= @one_month_ago AS is_latest
+            FROM `{full_historical_unprocessable_table}`
+            WHERE created_at >= @two_months_ago
                 AND id_matricula IS NOT NULL
         ),
         beneficiary_counts AS (
             SELECT
-                (SELECT COUNT(DISTINCT id_matricula) FROM latest_beneficiaries) AS latest_count,
-                (SELECT COUNT(DISTINCT id_matricula) FROM previous_beneficiaries) AS previous_count
+                COUNT(DISTINCT IF(is_latest, id_matricula, NULL)) AS latest_count,
+                COUNT(DISTINCT IF(is_latest, NULL, id_matricula)) AS previous_count
+            FROM beneficiary_rows
         )
         SELECT
             latest_count,
@@ -193,48 +181,54 @@ class BeneficiariesVolumeRatioBaseHandler(Handler):
         FROM beneficiary_counts
         """
 
+        # The query text only depends on the table names, so identical queries can reuse
+        # BigQuery's cached plans and results across events
+        job_config = QueryJobConfig(
+            query_parameters=[
+                ScalarQueryParameter("one_month_ago", "STRING", one_month_ago_date),
+                ScalarQueryParameter("two_months_ago", "STRING", two_months_ago_date),
+            ]
+        )
+
+        # Batch tables are required; without the historical tables there is no history to
+        # compare against (existence results are cached across events)
         try:
-            # Check if batch tables exist
-            self.bq_client.get_table(full_batch_processable_table)
-            self.bq_client.get_table(full_batch_unprocessable_table)
-
-            # Check if historical tables exist
-            historical_tables_exist = True
-            try:
-                self.bq_client.get_table(full_historical_processable_table)
-                self.bq_client.get_table(full_historical_unprocessable_table)
-            except NotFound:
-                historical_tables_exist = False
-
-            if historical_tables_exist:
-                # Query with historical tables
-                query_job = self.bq_client.query(new_beneficiaries_query)
-                result = query_job.result()
-                for row in result:
-                    ratio = float(row.ratio)
-
-                    # Emit metric
-                    emit_gauge_metric(
-                        monitoring_client=self.monitoring_client,
-                        project_id=self.run_project_id,
-                        name="claims/pipeline/beneficiaries/volume_ratio_last_1_mo",
-                        value=ratio,
-                        labels=base_labels,
-                        timestamp=source_timestamp,
-                    )
-            else:
-                # If historical tables don't exist, assume the volume ratio is 1.0
+            result = query_if_tables_exist(
+                self.bq_client,
+                beneficiaries_volume_ratio_query,
+                required_tables=[full_batch_processable_table, full_batch_unprocessable_table],
+                optional_tables=[
+                    full_historical_processable_table,
+                    full_historical_unprocessable_table,
+                ],
+                job_config=job_config,
+                max_results=1,
+            )
+        except MissingTablesError as e:
+            raise HandlerBadRequestError(
+                f"Batch tables not found: {', '.join(e.table_refs)}"
+            ) from e
+
+        if result is not None:
+            for row in result:
+                ratio = float(row.ratio)
+
+                # Emit metric
                 emit_gauge_metric(
                     monitoring_client=self.monitoring_client,
                     project_id=self.run_project_id,
                     name="claims/pipeline/beneficiaries/volume_ratio_last_1_mo",
-                    value=1.0,
+                    value=ratio,
                     labels=base_labels,
                     timestamp=source_timestamp,
                 )
-
-        except NotFound:
-            # If batch tables don't exist, raise error
-            raise HandlerBadRequestError(
-                f"Batch tables not found: {batch_processable_table} or {batch_unprocessable_table}"
+        else:
+            # If historical tables don't exist, assume the volume ratio is 1.0
+            emit_gauge_metric(
+                monitoring_client=self.monitoring_client,
+                project_id=self.run_project_id,
+                name="claims/pipeline/beneficiaries/volume_ratio_last_1_mo",
+                value=1.0,
+                labels=base_labels,
+                timestamp=source_timestamp,
             )
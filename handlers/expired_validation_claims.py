@@ -5,7 +5,12 @@ from datetime import datetime
 from google.cloud import bigquery, monitoring_v3
 from google.cloud.bigquery import QueryJobConfig, ScalarQueryParameter
 
-from handlers.base import Handler, HandlerBadRequestError
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+)
 from metrics import emit_gauge_metric
 
 
@@ -24,6 +29,8 @@ class ExpiredValidationClaimsHandler(Handler):
     - claims/pipeline/validation/vl_glosa_arvo/expired/total (sum of internal + manual)
     """
 
+    MATCH_KEY = ("pipesv2_release", "COMPLETED")
+
     def __init__(
         self,
         monitoring_client: monitoring_v3.MetricServiceClient,
@@ -67,7 +74,7 @@ class ExpiredValidationClaimsHandler(Handler):
         pipeline_uuid = payload.get("pipeline_uuid")
         pipeline_status = payload.get("status")
 
-        return pipeline_uuid == "pipesv2_release" and pipeline_status == "COMPLETED"
+        return (pipeline_uuid, pipeline_status) == self.MATCH_KEY
 
     def handle(self, decoded_message: dict) -> None:
         """
@@ -106,22 +113,21 @@ class ExpiredValidationClaimsHandler(Handler):
             )
 
         # Ensure fully-qualified table paths
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
-        full_internal_validation_table = ensure_full_table_ref(internal_validation_table)
-        full_manual_validation_table = ensure_full_table_ref(manual_validation_table)
+        full_internal_validation_table = ensure_full_table_ref(
+            internal_validation_table, self.data_project_id
+        )
+        full_manual_validation_table = ensure_full_table_ref(
+            manual_validation_table, self.data_project_id
+        )
 
         # Parse timestamp
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
 
-        # Query both tables and emit combined metric
-        internal_total = self._query_expired_sum(full_internal_validation_table, source_timestamp)
-        manual_total = self._query_expired_sum(full_manual_validation_table, source_timestamp)
+        # Sum both tables in a single query job
+        combined_total = self._query_combined_expired_sum(
+            full_internal_validation_table, full_manual_validation_table, source_timestamp
+        )
 
-        combined_total = internal_total + manual_total
         emit_gauge_metric(
             monitoring_client=self.monitoring_client,
             project_id=self.run_project_id,
@@ -131,29 +137,48 @@ class ExpiredValidationClaimsHandler(Handler):
             timestamp=source_timestamp,
         )
 
-    def _query_expired_sum(self, table_name: str, source_timestamp: datetime) -> float:
+    def _query_combined_expired_sum(
+        self,
+        internal_table_name: str,
+        manual_table_name: str,
+        source_timestamp: datetime,
+    ) -> float:
         """
-        Query the sum of vl_glosa_arvo for expired claims.
+        Query the combined sum of vl_glosa_arvo for expired claims in both tables.
 
         Uses a 2-day partition filter on ingested_at and a 30-minute row filter
         on updated_at to optimize query costs and focus on recently updated items.
+        The status = 'EXPIRED' filter only skips storage blocks when the validation
+        tables are clustered by status; those tables are created by the pipelines,
+        so clustering them is configured there.
 
         Args:
-            table_name: Fully-qualified BigQuery table name
+            internal_table_name: Fully-qualified internal validation table name
+            manual_table_name: Fully-qualified manual validation table name
             source_timestamp: The source timestamp from the event
 
         Returns:
-            The sum of vl_glosa_arvo for expired claims, or 0 if none found
+            The sum of vl_glosa_arvo for expired claims across both tables, or 0 if none found
         """
+        predicate = """
+                ingested_at >= TIMESTAMP_SUB(@source_timestamp, INTERVAL 2 DAY)
+                AND ingested_at <= @source_timestamp
+                AND updated_at >= DATETIME_SUB(DATETIME(@source_timestamp), INTERVAL 30 MINUTE)
+                AND updated_at <= DATETIME(@source_timestamp)
+                AND status = 'EXPIRED'
+        """
+
         query = f"""
-        SELECT COALESCE(SUM(vl_glosa_arvo), 0) as total_vl_glosa_arvo
-        FROM `{table_name}`
-        WHERE
-            ingested_at >= TIMESTAMP_SUB(@source_timestamp, INTERVAL 2 DAY)
-            AND ingested_at <= @source_timestamp
-            AND updated_at >= DATETIME_SUB(DATETIME(@source_timestamp), INTERVAL 30 MINUTE)
-            AND updated_at <= DATETIME(@source_timestamp)
-            AND status = 'EXPIRED'
+        SELECT
+            (
+                SELECT COALESCE(SUM(vl_glosa_arvo), 0)
+                FROM `{internal_table_name}`
+                WHERE {predicate}
+            ) + (
+                SELECT COALESCE(SUM(vl_glosa_arvo), 0)
+                FROM `{manual_table_name}`
+                WHERE {predicate}
+            ) as total_vl_glosa_arvo
         """
 
         job_config = QueryJobConfig(
@@ -163,8 +188,7 @@ class ExpiredValidationClaimsHandler(Handler):
         )
 
         query_job = self.bq_client.query(query, job_config=job_config)
-        result = query_job.result()
-        row = next(result, None)
+        row = next(query_job.result(), None)
 
         if row:
             return float(row.total_vl_glosa_arvo or 0.0)
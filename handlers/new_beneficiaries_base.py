@@ -4,12 +4,19 @@ This module contains the base class for handlers that calculate and emit
 new beneficiaries metrics from pipeline completion events.
 """
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-from google.api_core.exceptions import NotFound
 from google.cloud import bigquery, monitoring_v3
+from google.cloud.bigquery import QueryJobConfig, ScalarQueryParameter
 
-from handlers.base import Handler, HandlerBadRequestError
+from bigquery import MissingTablesError, query_if_tables_exist
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+    require_variables,
+)
 from metrics import emit_gauge_metric
 
 
@@ -30,6 +37,7 @@ class NewBeneficiariesBaseHandler(Handler):
         bq_client: bigquery.Client,
         run_project_id: str,
         data_project_id: str,
+        historical_partition_column: str | None = None,
     ):
         """
         Initialize the handler.
@@ -39,11 +47,27 @@ class NewBeneficiariesBaseHandler(Handler):
             bq_client: BigQuery client
             run_project_id: Project ID for metric emission
             data_project_id: Project ID for BigQuery data
+            historical_partition_column: Partition column of the historical tables, such as
+                _PARTITIONDATE, also filtered on the 3-month window so BigQuery prunes
+                partitions even when created_at is not the partitioning column. None
+                filters on created_at only.
+
+        Raises:
+            ValueError: If historical_partition_column is not a valid column name
         """
+        if (
+            historical_partition_column is not None
+            and not historical_partition_column.isidentifier()
+        ):
+            raise ValueError(
+                f"Invalid historical partition column: {historical_partition_column!r}"
+            )
+
         self.monitoring_client = monitoring_client
         self.bq_client = bq_client
         self.run_project_id = run_project_id
         self.data_project_id = data_project_id
+        self.historical_partition_column = historical_partition_column
 
     def _handle_new_beneficiaries_metrics(
         self,
@@ -83,48 +107,40 @@ class NewBeneficiariesBaseHandler(Handler):
 
         variables = payload.get("variables", {})
 
-        batch_processable_table = variables.get(batch_processable_table_var)
-        batch_unprocessable_table = variables.get(batch_unprocessable_table_var)
-        historical_processable_table = variables.get(historical_processable_table_var)
-        historical_unprocessable_table = variables.get(historical_unprocessable_table_var)
-
-        if not batch_processable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{batch_processable_table_var}' found in payload."
-            )
-
-        if not batch_unprocessable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{batch_unprocessable_table_var}' found in payload."
-            )
-
-        if not historical_processable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{historical_processable_table_var}' found in payload."
-            )
-
-        if not historical_unprocessable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{historical_unprocessable_table_var}' found in payload."
-            )
+        (
+            batch_processable_table,
+            batch_unprocessable_table,
+            historical_processable_table,
+            historical_unprocessable_table,
+        ) = require_variables(
+            variables,
+            batch_processable_table_var,
+            batch_unprocessable_table_var,
+            historical_processable_table_var,
+            historical_unprocessable_table_var,
+        )
 
         # Ensure fully-qualified table paths
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
-        full_batch_processable_table = ensure_full_table_ref(batch_processable_table)
-        full_batch_unprocessable_table = ensure_full_table_ref(batch_unprocessable_table)
-        full_historical_processable_table = ensure_full_table_ref(historical_processable_table)
-        full_historical_unprocessable_table = ensure_full_table_ref(historical_unprocessable_table)
+        full_batch_processable_table = ensure_full_table_ref(
+            batch_processable_table, self.data_project_id
+        )
+        full_batch_unprocessable_table = ensure_full_table_ref(
+            batch_unprocessable_table, self.data_project_id
+        )
+        full_historical_processable_table = ensure_full_table_ref(
+            historical_processable_table, self.data_project_id
+        )
+        full_historical_unprocessable_table = ensure_full_table_ref(
+            historical_unprocessable_table, self.data_project_id
+        )
 
         # Parse timestamp for 3-month window calculation
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
         three_months_ago = source_timestamp - timedelta(days=90)
         # Format as date only (YYYY-MM-DD) for simple comparison
-        # This works directly with DATETIME and TIMESTAMP columns in BigQuery and emulator
-        three_months_ago_date = three_months_ago.strftime("%Y-%m-%d")
+        # Bound as a STRING parameter, which BigQuery coerces to the column type like a
+        # literal, so this works with DATETIME and TIMESTAMP columns in BigQuery and emulator
+        three_months_ago_date = three_months_ago.date().isoformat()
 
         # Build base labels
         partner_value = variables.get("partner")
@@ -135,64 +151,60 @@ class NewBeneficiariesBaseHandler(Handler):
             "approved": approved_value,
         }
 
+        # Optional filter on the historical tables' partition column, so partitions outside the
+        # window are pruned even when created_at is not the partitioning column
+        historical_window_filter = "h1.created_at >= @three_months_ago"
+        if self.historical_partition_column:
+            historical_window_filter += (
+                f" AND h1.{self.historical_partition_column} >= @three_months_ago"
+            )
+
         # Query to calculate new beneficiaries percentage
         # This query is compatible with both BigQuery and BigQuery emulator (SQLite)
         # Excludes batch items from historical lookup to avoid counting them as existing
         new_beneficiaries_query = f"""
-        WITH batch_id_arvo AS (
+        WITH batch_rows AS (
+            -- Shared by batch_id_arvo and batch_beneficiaries so the SQL is written once.
+            -- BigQuery inlines CTEs, so each reference still scans the batch tables.
+            SELECT id_arvo, id_matricula
+            FROM `{full_batch_processable_table}`
+            UNION ALL
+            SELECT id_arvo, id_matricula
+            FROM `{full_batch_unprocessable_table}`
+        ),
+        batch_id_arvo AS (
             SELECT DISTINCT id_arvo
-            FROM (
-                SELECT id_arvo
-                FROM `{full_batch_processable_table}`
-                WHERE id_arvo IS NOT NULL
-                UNION ALL
-                SELECT id_arvo
-                FROM `{full_batch_unprocessable_table}`
-                WHERE id_arvo IS NOT NULL
-            )
+            FROM batch_rows
+            WHERE id_arvo IS NOT NULL
         ),
         batch_beneficiaries AS (
             SELECT DISTINCT id_matricula
-            FROM (
-                SELECT id_matricula
-                FROM `{full_batch_processable_table}`
-                WHERE id_matricula IS NOT NULL
-                UNION ALL
-                SELECT id_matricula
-                FROM `{full_batch_unprocessable_table}`
-                WHERE id_matricula IS NOT NULL
-            )
+            FROM batch_rows
+            WHERE id_matricula IS NOT NULL
         ),
         historical_beneficiaries AS (
-            SELECT DISTINCT id_matricula
-            FROM (
-                SELECT id_matricula
-                FROM `{full_historical_processable_table}` h1
-                WHERE created_at >= '{three_months_ago_date}'
-                    AND id_matricula IS NOT NULL
-                    AND NOT EXISTS (
-                        SELECT 1
-                        FROM batch_id_arvo b
-                        WHERE b.id_arvo = h1.id_arvo
-                    )
-                UNION ALL
-                SELECT id_matricula
-                FROM `{full_historical_unprocessable_table}` h1
-                WHERE created_at >= '{three_months_ago_date}'
-                    AND id_matricula IS NOT NULL
-                    AND NOT EXISTS (
-                        SELECT 1
-                        FROM batch_id_arvo b
-                        WHERE b.id_arvo = h1.id_arvo
-                    )
-            )
+            SELECT h1.id_matricula
+            FROM `{full_historical_processable_table}` h1
+            LEFT JOIN batch_id_arvo b
+                ON b.id_arvo = h1.id_arvo
+            WHERE {historical_window_filter}
+                AND h1.id_matricula IS NOT NULL
+                AND b.id_arvo IS NULL
+            UNION DISTINCT
+            SELECT h1.id_matricula
+            FROM `{full_historical_unprocessable_table}` h1
+            LEFT JOIN batch_id_arvo b
+                ON b.id_arvo = h1.id_arvo
+            WHERE {historical_window_filter}
+                AND h1.id_matricula IS NOT NULL
+                AND b.id_arvo IS NULL
         ),
+        -- Both sides are already deduplicated, so the join yields one row per batch
+        -- beneficiary and plain counts are exact
         beneficiary_counts AS (
             SELECT
-                COUNT(DISTINCT bb.id_matricula) AS total_beneficiaries,
-                COUNT(DISTINCT CASE
-                    WHEN hb.id_matricula IS NULL THEN bb.id_matricula
-                END) AS new_beneficiaries
+                COUNT(*) AS total_beneficiaries,
+                COUNTIF(hb.id_matricula IS NULL) AS new_beneficiaries
             FROM batch_beneficiaries bb
             LEFT JOIN historical_beneficiaries hb
                 ON bb.id_matricula = hb.id_matricula
@@ -208,49 +220,53 @@ class NewBeneficiariesBaseHandler(Handler):
         FROM beneficiary_counts
         """
 
-        try:
-            # Check if batch tables exist
-            self.bq_client.get_table(full_batch_processable_table)
-            self.bq_client.get_table(full_batch_unprocessable_table)
+        # The query text only depends on the table names, so identical queries can reuse
+        # BigQuery's cached plans and results across events
+        job_config = QueryJobConfig(
+            query_parameters=[
+                ScalarQueryParameter("three_months_ago", "STRING", three_months_ago_date),
+            ]
+        )
 
-            # Check if historical tables exist
-            historical_tables_exist = True
-            try:
-                self.bq_client.get_table(full_historical_processable_table)
-                self.bq_client.get_table(full_historical_unprocessable_table)
-            except NotFound:
-                historical_tables_exist = False
+        # Batch tables are required; without the historical tables there is no history to
+        # compare against (existence results are cached across events)
+        try:
+            result = query_if_tables_exist(
+                self.bq_client,
+                new_beneficiaries_query,
+                required_tables=[full_batch_processable_table, full_batch_unprocessable_table],
+                optional_tables=[
+                    full_historical_processable_table,
+                    full_historical_unprocessable_table,
+                ],
+                job_config=job_config,
+            )
+        except MissingTablesError as e:
+            raise HandlerBadRequestError(
+                f"Batch tables not found: {', '.join(e.table_refs)}"
+            ) from e
 
-            if historical_tables_exist:
-                # Query with historical tables
-                query_job = self.bq_client.query(new_beneficiaries_query)
-                result = query_job.result()
-                for row in result:
-                    new_pct = float(row.new_pct or 0.0)
+        if result is not None:
+            for row in result:
+                new_pct = float(row.new_pct or 0.0)
 
-                    # Emit metric
-                    emit_gauge_metric(
-                        monitoring_client=self.monitoring_client,
-                        project_id=self.run_project_id,
-                        name="claims/pipeline/beneficiaries/new_pct_last_3_mo",
-                        value=new_pct,
-                        labels=base_labels,
-                        timestamp=source_timestamp,
-                    )
-            else:
-                # If historical tables don't exist, assume all beneficiaries are new (100%)
-                # Emit metric with 100% new beneficiaries
+                # Emit metric
                 emit_gauge_metric(
                     monitoring_client=self.monitoring_client,
                     project_id=self.run_project_id,
                     name="claims/pipeline/beneficiaries/new_pct_last_3_mo",
-                    value=1.0,
+                    value=new_pct,
                     labels=base_labels,
                     timestamp=source_timestamp,
                 )
-
-        except NotFound:
-            # If batch tables don't exist, raise error
-            raise HandlerBadRequestError(
-                f"Batch tables not found: {batch_processable_table} or {batch_unprocessable_table}"
+        else:
+            # If historical tables don't exist, assume all beneficiaries are new (100%)
+            # Emit metric with 100% new beneficiaries
+            emit_gauge_metric(
+                monitoring_client=self.monitoring_client,
+                project_id=self.run_project_id,
+                name="claims/pipeline/beneficiaries/new_pct_last_3_mo",
+                value=1.0,
+                labels=base_labels,
+                timestamp=source_timestamp,
             )
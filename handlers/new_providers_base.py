@@ -4,12 +4,19 @@ This module contains the base class for handlers that calculate and emit
 new providers metrics from pipeline completion events.
 """
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-from google.api_core.exceptions import NotFound
 from google.cloud import bigquery, monitoring_v3
+from google.cloud.bigquery import QueryJobConfig, ScalarQueryParameter
 
-from handlers.base import Handler, HandlerBadRequestError
+from bigquery import MissingTablesError, query_if_tables_exist
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+    require_variables,
+)
 from metrics import emit_gauge_metric
 
 
@@ -30,6 +37,7 @@ class NewProvidersBaseHandler(Handler):
         bq_client: bigquery.Client,
         run_project_id: str,
         data_project_id: str,
+        historical_partition_column: str | None = None,
     ):
         """
         Initialize the handler.
@@ -39,11 +47,27 @@ class NewProvidersBaseHandler(Handler):
             bq_client: BigQuery client
             run_project_id: Project ID for metric emission
             data_project_id: Project ID for BigQuery data
+            historical_partition_column: Partition column of the historical tables, such as
+                _PARTITIONDATE, also filtered on the 3-month window so BigQuery prunes
+                partitions even when created_at is not the partitioning column. None
+                filters on created_at only.
+
+        Raises:
+            ValueError: If historical_partition_column is not a valid column name
         """
+        if (
+            historical_partition_column is not None
+            and not historical_partition_column.isidentifier()
+        ):
+            raise ValueError(
+                f"Invalid historical partition column: {historical_partition_column!r}"
+            )
+
         self.monitoring_client = monitoring_client
         self.bq_client = bq_client
         self.run_project_id = run_project_id
         self.data_project_id = data_project_id
+        self.historical_partition_column = historical_partition_column
 
     def _handle_new_providers_metrics(
         self,
@@ -82,48 +106,40 @@ class NewProvidersBaseHandler(Handler):
 
         variables = payload.get("variables", {})
 
-        batch_processable_table = variables.get(batch_processable_table_var)
-        batch_unprocessable_table = variables.get(batch_unprocessable_table_var)
-        historical_processable_table = variables.get(historical_processable_table_var)
-        historical_unprocessable_table = variables.get(historical_unprocessable_table_var)
-
-        if not batch_processable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{batch_processable_table_var}' found in payload."
-            )
-
-        if not batch_unprocessable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{batch_unprocessable_table_var}' found in payload."
-            )
-
-        if not historical_processable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{historical_processable_table_var}' found in payload."
-            )
-
-        if not historical_unprocessable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{historical_unprocessable_table_var}' found in payload."
-            )
+        (
+            batch_processable_table,
+            batch_unprocessable_table,
+            historical_processable_table,
+            historical_unprocessable_table,
+        ) = require_variables(
+            variables,
+            batch_processable_table_var,
+            batch_unprocessable_table_var,
+            historical_processable_table_var,
+            historical_unprocessable_table_var,
+        )
 
         # Ensure fully-qualified table paths
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
-        full_batch_processable_table = ensure_full_table_ref(batch_processable_table)
-        full_batch_unprocessable_table = ensure_full_table_ref(batch_unprocessable_table)
-        full_historical_processable_table = ensure_full_table_ref(historical_processable_table)
-        full_historical_unprocessable_table = ensure_full_table_ref(historical_unprocessable_table)
+        full_batch_processable_table = ensure_full_table_ref(
+            batch_processable_table, self.data_project_id
+        )
+        full_batch_unprocessable_table = ensure_full_table_ref(
+            batch_unprocessable_table, self.data_project_id
+        )
+        full_historical_processable_table = ensure_full_table_ref(
+            historical_processable_table, self.data_project_id
+        )
+        full_historical_unprocessable_table = ensure_full_table_ref(
+            historical_unprocessable_table, self.data_project_id
+        )
 
         # Parse timestamp for 3-month window calculation
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
         three_months_ago = source_timestamp - timedelta(days=90)
         # Format as date only (YYYY-MM-DD) for simple comparison
-        # This works directly with DATETIME and TIMESTAMP columns in BigQuery and emulator
-        three_months_ago_date = three_months_ago.strftime("%Y-%m-%d")
+        # Bound as a STRING parameter, which BigQuery coerces to the column type like a
+        # literal, so this works with DATETIME and TIMESTAMP columns in BigQuery and emulator
+        three_months_ago_date = three_months_ago.date().isoformat()
 
         # Build base labels
         partner_value = variables.get("partner")
@@ -134,64 +150,60 @@ class NewProvidersBaseHandler(Handler):
             "approved": approved_value,
         }
 
+        # Optional filter on the historical tables' partition column, so partitions outside the
+        # window are pruned even when created_at is not the partitioning column
+        historical_window_filter = "h1.created_at >= @three_months_ago"
+        if self.historical_partition_column:
+            historical_window_filter += (
+                f" AND h1.{self.historical_partition_column} >= @three_months_ago"
+            )
+
         # Query to calculate new providers percentage
         # This query is compatible with both BigQuery and BigQuery emulator (SQLite)
         # Excludes batch items from historical lookup to avoid counting them as existing
         new_providers_query = f"""
-        WITH batch_id_arvo AS (
+        WITH batch_rows AS (
+            -- Shared by batch_id_arvo and batch_providers so the SQL is written once.
+            -- BigQuery inlines CTEs, so each reference still scans the batch tables.
+            SELECT id_arvo, id_prestador
+            FROM `{full_batch_processable_table}`
+            UNION ALL
+            SELECT id_arvo, id_prestador
+            FROM `{full_batch_unprocessable_table}`
+        ),
+        batch_id_arvo AS (
             SELECT DISTINCT id_arvo
-            FROM (
-                SELECT id_arvo
-                FROM `{full_batch_processable_table}`
-                WHERE id_arvo IS NOT NULL
-                UNION ALL
-                SELECT id_arvo
-                FROM `{full_batch_unprocessable_table}`
-                WHERE id_arvo IS NOT NULL
-            )
+            FROM batch_rows
+            WHERE id_arvo IS NOT NULL
         ),
         batch_providers AS (
             SELECT DISTINCT id_prestador
-            FROM (
-                SELECT id_prestador
-                FROM `{full_batch_processable_table}`
-                WHERE id_prestador IS NOT NULL
-                UNION ALL
-                SELECT id_prestador
-                FROM `{full_batch_unprocessable_table}`
-                WHERE id_prestador IS NOT NULL
-            )
+            FROM batch_rows
+            WHERE id_prestador IS NOT NULL
         ),
         historical_providers AS (
-            SELECT DISTINCT id_prestador
-            FROM (
-                SELECT id_prestador
-                FROM `{full_historical_processable_table}` h1
-                WHERE created_at >= '{three_months_ago_date}'
-                    AND id_prestador IS NOT NULL
-                    AND NOT EXISTS (
-                        SELECT 1
-                        FROM batch_id_arvo b
-                        WHERE b.id_arvo = h1.id_arvo
-                    )
-                UNION ALL
-                SELECT id_prestador
-                FROM `{full_historical_unprocessable_table}` h1
-                WHERE created_at >= '{three_months_ago_date}'
-                    AND id_prestador IS NOT NULL
-                    AND NOT EXISTS (
-                        SELECT 1
-                        FROM batch_id_arvo b
-                        WHERE b.id_arvo = h1.id_arvo
-                    )
-            )
+            SELECT h1.id_prestador
+            FROM `{full_historical_processable_table}` h1
+            LEFT JOIN batch_id_arvo b
+                ON b.id_arvo = h1.id_arvo
+            WHERE {historical_window_filter}
+                AND h1.id_prestador IS NOT NULL
+                AND b.id_arvo IS NULL
+            UNION DISTINCT
+            SELECT h1.id_prestador
+            FROM `{full_historical_unprocessable_table}` h1
+            LEFT JOIN batch_id_arvo b
+                ON b.id_arvo = h1.id_arvo
+            WHERE {historical_window_filter}
+                AND h1.id_prestador IS NOT NULL
+                AND b.id_arvo IS NULL
         ),
+        -- Both sides are already deduplicated, so the join yields one row per batch
+        -- provider and plain counts are exact
         provider_counts AS (
             SELECT
-                COUNT(DISTINCT bp.id_prestador) AS total_providers,
-                COUNT(DISTINCT CASE
-                    WHEN hp.id_prestador IS NULL THEN bp.id_prestador
-                END) AS new_providers
+                COUNT(*) AS total_providers,
+                COUNTIF(hp.id_prestador IS NULL) AS new_providers
             FROM batch_providers bp
             LEFT JOIN historical_providers hp
                 ON bp.id_prestador = hp.id_prestador
@@ -207,49 +219,53 @@ class NewProvidersBaseHandler(Handler):
         FROM provider_counts
         """
 
+        # The query text only depends on the table names, so identical queries can reuse
+        # BigQuery's cached plans and results across events
+        job_config = QueryJobConfig(
+            query_parameters=[
+                ScalarQueryParameter("three_months_ago", "STRING", three_months_ago_date),
+            ]
+        )
+
+        # Batch tables are required; without the historical tables there is no history to
+        # compare against (existence results are cached across events)
         try:
-            # Check if batch tables exist
-            self.bq_client.get_table(full_batch_processable_table)
-            self.bq_client.get_table(full_batch_unprocessable_table)
-
-            # Check if historical tables exist
-            historical_tables_exist = True
-            try:
-                self.bq_client.get_table(full_historical_processable_table)
-                self.bq_client.get_table(full_historical_unprocessable_table)
-            except NotFound:
-                historical_tables_exist = False
-
-            if historical_tables_exist:
-                # Query with historical tables
-                query_job = self.bq_client.query(new_providers_query)
-                result = query_job.result()
-                for row in result:
-                    new_pct = float(row.new_pct or 0.0)
-
-                    # Emit metric
-                    emit_gauge_metric(
-                        monitoring_client=self.monitoring_client,
-                        project_id=self.run_project_id,
-                        name="claims/pipeline/providers/new_pct_last_3_mo",
-                        value=new_pct,
-                        labels=base_labels,
-                        timestamp=source_timestamp,
-                    )
-            else:
-                # If historical tables don't exist, assume all providers are new (100%)
-                # Emit metric with 100% new providers
+            result = query_if_tables_exist(
+                self.bq_client,
+                new_providers_query,
+                required_tables=[full_batch_processable_table, full_batch_unprocessable_table],
+                optional_tables=[
+                    full_historical_processable_table,
+                    full_historical_unprocessable_table,
+                ],
+                job_config=job_config,
+            )
+        except MissingTablesError as e:
+            raise HandlerBadRequestError(
+                f"Batch tables not found: {', '.join(e.table_refs)}"
+            ) from e
+
+        if result is not None:
+            for row in result:
+                new_pct = float(row.new_pct or 0.0)
+
+                # Emit metric
                 emit_gauge_metric(
                     monitoring_client=self.monitoring_client,
                     project_id=self.run_project_id,
                     name="claims/pipeline/providers/new_pct_last_3_mo",
-                    value=1.0,
+                    value=new_pct,
                     labels=base_labels,
                     timestamp=source_timestamp,
                 )
-
-        except NotFound:
-            # If batch tables don't exist, raise error
-            raise HandlerBadRequestError(
-                f"Batch tables not found: {batch_processable_table} or {batch_unprocessable_table}"
+        else:
+            # If historical tables don't exist, assume all providers are new (100%)
+            # Emit metric with 100% new providers
+            emit_gauge_metric(
+                monitoring_client=self.monitoring_client,
+                project_id=self.run_project_id,
+                name="claims/pipeline/providers/new_pct_last_3_mo",
+                value=1.0,
+                labels=base_labels,
+                timestamp=source_timestamp,
             )
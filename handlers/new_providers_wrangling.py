@@ -21,12 +21,15 @@ class NewProvidersWranglingHandler(NewProvidersBaseHandler):
     introduction during the wrangling pipeline execution.
     """
 
+    MATCH_KEY = ("pipesv2_wrangling", "COMPLETED")
+
     def __init__(
         self,
         monitoring_client: monitoring_v3.MetricServiceClient,
         bq_client: bigquery.Client,
         run_project_id: str,
         data_project_id: str,
+        historical_partition_column: str | None = None,
     ):
         """
         Initialize the handler.
@@ -36,8 +39,16 @@ class NewProvidersWranglingHandler(NewProvidersBaseHandler):
             bq_client: BigQuery client
             run_project_id: Project ID for metric emission
             data_project_id: Project ID for BigQuery data
+            historical_partition_column: Partition column of the historical tables to
+                filter on, or None to filter on created_at only
         """
-        super().__init__(monitoring_client, bq_client, run_project_id, data_project_id)
+        super().__init__(
+            monitoring_client,
+            bq_client,
+            run_project_id,
+            data_project_id,
+            historical_partition_column=historical_partition_column,
+        )
 
     def match(self, decoded_message: dict) -> bool:
         """
@@ -61,7 +72,7 @@ class NewProvidersWranglingHandler(NewProvidersBaseHandler):
         pipeline_uuid = payload.get("pipeline_uuid")
         pipeline_status = payload.get("status")
 
-        return pipeline_uuid == "pipesv2_wrangling" and pipeline_status == "COMPLETED"
+        return (pipeline_uuid, pipeline_status) == self.MATCH_KEY
 
     def handle(self, decoded_message: dict) -> None:
         """
@@ -7,11 +7,9 @@ identifier, execution status, and partner information, enabling monitoring
 and analysis of pipeline execution patterns across the system.
 """
 
-from datetime import datetime
-
 from google.cloud import monitoring_v3
 
-from handlers.base import Handler
+from handlers.base import Handler, parse_source_timestamp
 from metrics import emit_gauge_metric
 
 
@@ -66,9 +64,7 @@ class PipelineRunHandler(Handler):
         if partner_value:
             labels["partner"] = str(partner_value)
 
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
 
         emit_gauge_metric(
             monitoring_client=self.monitoring_client,
@@ -4,12 +4,17 @@ This module contains the base class for handlers that calculate and emit
 post-processing filter metrics from pipeline completion events.
 """
 
-from datetime import datetime
-
 from google.api_core.exceptions import NotFound
 from google.cloud import bigquery, monitoring_v3
 
-from handlers.base import Handler, HandlerBadRequestError
+from bigquery import forget_tables, table_exists
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+    require_variables,
+)
 from metrics import emit_gauge_metric
 
 
@@ -86,51 +91,36 @@ class PostFilteredBaseHandler(Handler):
         if payload.get("pipeline_uuid") != pipeline_uuid or payload.get("status") != "COMPLETED":
             return
 
-        excluded_table = variables.get(excluded_table_var)
-        savings_table = variables.get(savings_table_var)
-
-        if not excluded_table:
-            raise HandlerBadRequestError(f"No variable '{excluded_table_var}' found in payload.")
-
-        if not savings_table:
-            raise HandlerBadRequestError(f"No variable '{savings_table_var}' found in payload.")
+        excluded_table, savings_table = require_variables(
+            variables, excluded_table_var, savings_table_var
+        )
 
         # Ensure fully-qualified table paths
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
-        full_excluded_table = ensure_full_table_ref(excluded_table)
-        full_savings_table = ensure_full_table_ref(savings_table)
+        full_excluded_table = ensure_full_table_ref(excluded_table, self.data_project_id)
+        full_savings_table = ensure_full_table_ref(savings_table, self.data_project_id)
 
-        # Check if excluded table exists and query it separately
+        # Check if table exists first to avoid hanging on query
+        # (existence results are cached across events)
         # If excluded table doesn't exist, assume sum is 0
-        total_vl_glosa_arvo = 0.0
+        excluded_exists = table_exists(self.bq_client, full_excluded_table)
         try:
-            # Check if table exists first to avoid hanging on query
-            self.bq_client.get_table(full_excluded_table)
-            # Table exists, so query it
-            excluded_query = f"""
-            SELECT COALESCE(SUM(vl_glosa_arvo), 0) AS total_vl_glosa_arvo
-            FROM `{full_excluded_table}`
-            """
-            query_job = self.bq_client.query(excluded_query)
-            result = query_job.result()
-            row = next(result, None)
-            if row:
-                total_vl_glosa_arvo = float(row.total_vl_glosa_arvo or 0.0)
+            result = self._query_sums(full_excluded_table, full_savings_table, excluded_exists)
         except NotFound:
-            # If table doesn't exist, assume sum is 0
-            total_vl_glosa_arvo = 0.0
+            # A cached existence result may be stale; drop it and re-check the excluded
+            # table. If it is gone, retry with its sum as 0; otherwise the savings table
+            # is the missing one, which must fail the event
+            forget_tables(self.bq_client, full_excluded_table)
+            if not excluded_exists or table_exists(self.bq_client, full_excluded_table):
+                raise
+            result = self._query_sums(full_excluded_table, full_savings_table, False)
 
-        # Query savings table - must exist, so let exception be raised if it doesn't
-        savings_query = f"""
-        SELECT COALESCE(SUM(vl_glosa_arvo), 0) AS sum_savings_vl_glosa_arvo
-        FROM `{full_savings_table}`
-        """
-        query_job = self.bq_client.query(savings_query)
-        result = query_job.result()
         row = next(result, None)
-        sum_savings_vl_glosa_arvo = float(row.sum_savings_vl_glosa_arvo or 0.0)
+        if row is None:
+            total_vl_glosa_arvo = 0.0
+            sum_savings_vl_glosa_arvo = 0.0
+        else:
+            total_vl_glosa_arvo = float(row.total_vl_glosa_arvo or 0.0)
+            sum_savings_vl_glosa_arvo = float(row.sum_savings_vl_glosa_arvo or 0.0)
 
         # Calculate relative value
         if sum_savings_vl_glosa_arvo > 0:
@@ -150,9 +140,7 @@ class PostFilteredBaseHandler(Handler):
         labels["partner"] = str(partner_value)
 
         # Parse timestamp
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
 
         # Emit metric representing total value of savings filtered in post-processing
         emit_gauge_metric(
@@ -173,3 +161,40 @@ class PostFilteredBaseHandler(Handler):
             labels=labels,
             timestamp=source_timestamp,
         )
+
+    def _query_sums(
+        self, full_excluded_table: str, full_savings_table: str, excluded_exists: bool
+    ) -> bigquery.table.RowIterator:
+        """
+        Query the excluded and savings vl_glosa_arvo sums in a single job.
+
+        Args:
+            full_excluded_table: Fully-qualified excluded savings table
+            full_savings_table: Fully-qualified savings table
+            excluded_exists: Whether to read the excluded table; if False its sum is 0
+
+        Returns:
+            Row iterator with total_vl_glosa_arvo and sum_savings_vl_glosa_arvo
+
+        Raises:
+            NotFound: If a queried table doesn't exist
+        """
+        if excluded_exists:
+            excluded_sum_expression = (
+                f"(SELECT COALESCE(SUM(vl_glosa_arvo), 0) FROM `{full_excluded_table}`)"
+            )
+        else:
+            excluded_sum_expression = "0"
+
+        # Savings table must exist, so let exception be raised if it doesn't
+        sums_query = f"""
+        SELECT
+            {excluded_sum_expression} AS total_vl_glosa_arvo,
+            (
+                SELECT COALESCE(SUM(vl_glosa_arvo), 0)
+                FROM `{full_savings_table}`
+            ) AS sum_savings_vl_glosa_arvo
+        """
+        # query_and_wait uses jobs.query, which returns short results without the
+        # separate job creation and polling round-trips of query().result()
+        return self.bq_client.query_and_wait(sums_query)
@@ -23,6 +23,8 @@ class PostFilteredSelectionHandler(PostFilteredBaseHandler):
     during the selection pipeline execution.
     """
 
+    MATCH_KEY = ("pipesv2_selection", "COMPLETED")
+
     def __init__(
         self,
         monitoring_client: monitoring_v3.MetricServiceClient,
@@ -63,7 +65,7 @@ class PostFilteredSelectionHandler(PostFilteredBaseHandler):
         pipeline_uuid = payload.get("pipeline_uuid")
         pipeline_status = payload.get("status")
 
-        return pipeline_uuid == "pipesv2_selection" and pipeline_status == "COMPLETED"
+        return (pipeline_uuid, pipeline_status) == self.MATCH_KEY
 
     def handle(self, decoded_message: dict) -> None:
         """
@@ -4,13 +4,17 @@ This module contains the base class for handlers that calculate and emit
 pre-processing filter metrics from pipeline completion events.
 """
 
-from datetime import datetime
-
-from google.api_core.exceptions import NotFound
 from google.cloud import bigquery, monitoring_v3
 
-from handlers.base import Handler, HandlerBadRequestError
-from metrics import emit_gauge_metric
+from bigquery import sum_vl_pago_by_source
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+    require_variables,
+)
+from metrics import build_gauge_time_series, emit_time_series
 
 
 class PreFilteredBaseHandler(Handler):
@@ -87,62 +91,20 @@ class PreFilteredBaseHandler(Handler):
         if payload.get("pipeline_uuid") != pipeline_uuid or payload.get("status") != "COMPLETED":
             return
 
-        unprocessable_table = variables.get(unprocessable_table_var)
-        processable_table = variables.get(processable_table_var)
-
-        if not unprocessable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{unprocessable_table_var}' found in payload."
-            )
-
-        if not processable_table:
-            raise HandlerBadRequestError(f"No variable '{processable_table_var}' found in payload.")
+        unprocessable_table, processable_table = require_variables(
+            variables, unprocessable_table_var, processable_table_var
+        )
 
         # Ensure fully-qualified table paths
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
-        full_unprocessable_table = ensure_full_table_ref(unprocessable_table)
-        full_processable_table = ensure_full_table_ref(processable_table)
+        full_unprocessable_table = ensure_full_table_ref(unprocessable_table, self.data_project_id)
+        full_processable_table = ensure_full_table_ref(processable_table, self.data_project_id)
 
-        # Check if tables exist and query them separately
         # If unprocessable table doesn't exist, assume sum is 0
-        total_vl_pago = 0.0
-        try:
-            # Check if table exists first to avoid hanging on query
-            self.bq_client.get_table(full_unprocessable_table)
-            # Table exists, so query it
-            unprocessable_query = f"""
-            SELECT COALESCE(SUM(vl_pago), 0) AS total_vl_pago
-            FROM `{full_unprocessable_table}`
-            """
-            query_job = self.bq_client.query(unprocessable_query)
-            result = query_job.result()
-            row = next(result, None)
-            if row:
-                total_vl_pago = float(row.total_vl_pago or 0.0)
-        except NotFound:
-            # If table doesn't exist, assume sum is 0
-            total_vl_pago = 0.0
-
         # If processable table doesn't exist, skip relative metric
-        processable_sum = None
-        try:
-            # Check if table exists first to avoid hanging on query
-            self.bq_client.get_table(full_processable_table)
-            # Table exists, so query it
-            processable_query = f"""
-            SELECT COALESCE(SUM(vl_pago), 0) AS sum_processable_vl_pago
-            FROM `{full_processable_table}`
-            """
-            query_job = self.bq_client.query(processable_query)
-            result = query_job.result()
-            row = next(result, None)
-            if row:
-                processable_sum = float(row.sum_processable_vl_pago or 0.0)
-        except NotFound:
-            # If table doesn't exist, processable_sum remains None
-            processable_sum = None
+        unprocessable_sum, processable_sum = sum_vl_pago_by_source(
+            self.bq_client, full_unprocessable_table, full_processable_table
+        )
+        total_vl_pago = unprocessable_sum or 0.0
 
         # Calculate relative value only if processable table exists
         relative_vl_pago = None
@@ -165,28 +127,35 @@ class PreFilteredBaseHandler(Handler):
         labels["partner"] = str(partner_value)
 
         # Parse timestamp
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
 
-        # Emit metric representing total value of claims filtered in pre-processing
-        emit_gauge_metric(
-            monitoring_client=self.monitoring_client,
-            project_id=self.run_project_id,
-            name="claims/pipeline/filtered_pre/vl_pago/total",
-            value=total_vl_pago,
-            labels=labels,
-            timestamp=source_timestamp,
-        )
-
-        # Emit metric representing relative value of claims filtered in pre-processing
-        # Only emit if processable table exists (processable_sum is not None)
-        if relative_vl_pago is not None:
-            emit_gauge_metric(
-                monitoring_client=self.monitoring_client,
+        # Metric representing total value of claims filtered in pre-processing
+        time_series = [
+            build_gauge_time_series(
                 project_id=self.run_project_id,
-                name="claims/pipeline/filtered_pre/vl_pago/relative",
-                value=relative_vl_pago,
+                name="claims/pipeline/filtered_pre/vl_pago/total",
+                value=total_vl_pago,
                 labels=labels,
                 timestamp=source_timestamp,
             )
+        ]
+
+        # Metric representing relative value of claims filtered in pre-processing
+        # Only emit if processable table exists (processable_sum is not None)
+        if relative_vl_pago is not None:
+            time_series.append(
+                build_gauge_time_series(
+                    project_id=self.run_project_id,
+                    name="claims/pipeline/filtered_pre/vl_pago/relative",
+                    value=relative_vl_pago,
+                    labels=labels,
+                    timestamp=source_timestamp,
+                )
+            )
+
+        # Write both metrics with a single CreateTimeSeries request
+        emit_time_series(
+            monitoring_client=self.monitoring_client,
+            project_id=self.run_project_id,
+            time_series=time_series,
+        )
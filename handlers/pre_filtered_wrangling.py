@@ -23,6 +23,8 @@ class PreFilteredWranglingHandler(PreFilteredBaseHandler):
     during the wrangling pipeline execution.
     """
 
+    MATCH_KEY = ("pipesv2_wrangling", "COMPLETED")
+
     def __init__(
         self,
         monitoring_client: monitoring_v3.MetricServiceClient,
@@ -63,7 +65,7 @@ class PreFilteredWranglingHandler(PreFilteredBaseHandler):
         pipeline_uuid = payload.get("pipeline_uuid")
         pipeline_status = payload.get("status")
 
-        return pipeline_uuid == "pipesv2_wrangling" and pipeline_status == "COMPLETED"
+        return (pipeline_uuid, pipeline_status) == self.MATCH_KEY
 
     def handle(self, decoded_message: dict) -> None:
         """
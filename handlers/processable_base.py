@@ -4,13 +4,17 @@ This module contains the base class for handlers that calculate and emit
 processable claims metrics from pipeline completion events.
 """
 
-from datetime import datetime
-
-from google.api_core.exceptions import NotFound
 from google.cloud import bigquery, monitoring_v3
 
-from handlers.base import Handler, HandlerBadRequestError
-from metrics import emit_gauge_metric
+from bigquery import sum_vl_pago_by_source
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+    require_variables,
+)
+from metrics import build_gauge_time_series, emit_time_series
 
 
 class ProcessableBaseHandler(Handler):
@@ -87,63 +91,20 @@ class ProcessableBaseHandler(Handler):
         if payload.get("pipeline_uuid") != pipeline_uuid or payload.get("status") != "COMPLETED":
             return
 
-        processable_table = variables.get(processable_table_var)
-        unprocessable_table = variables.get(unprocessable_table_var)
-
-        if not processable_table:
-            raise HandlerBadRequestError(f"No variable '{processable_table_var}' found in payload.")
-
-        if not unprocessable_table:
-            raise HandlerBadRequestError(
-                f"No variable '{unprocessable_table_var}' found in payload."
-            )
+        processable_table, unprocessable_table = require_variables(
+            variables, processable_table_var, unprocessable_table_var
+        )
 
         # Ensure fully-qualified table paths
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
-        full_processable_table = ensure_full_table_ref(processable_table)
-        full_unprocessable_table = ensure_full_table_ref(unprocessable_table)
-
-        # Check if processable table exists and query it separately
-        # If processable table doesn't exist, assume sum is 0
-        total_vl_pago = 0.0
-        try:
-            # Check if table exists first to avoid hanging on query
-            self.bq_client.get_table(full_processable_table)
-            # Table exists, so query it
-            processable_query = f"""
-            SELECT COALESCE(SUM(vl_pago), 0) AS total_vl_pago
-            FROM `{full_processable_table}`
-            """
-            query_job = self.bq_client.query(processable_query)
-            result = query_job.result()
-            row = next(result, None)
-            if row:
-                total_vl_pago = float(row.total_vl_pago or 0.0)
-        except NotFound:
-            # If table doesn't exist, assume sum is 0
-            total_vl_pago = 0.0
-
-        # Check if unprocessable table exists and query it separately
-        # If unprocessable table doesn't exist, assume sum is 0
-        sum_unprocessable_vl_pago = 0.0
-        try:
-            # Check if table exists first to avoid hanging on query
-            self.bq_client.get_table(full_unprocessable_table)
-            # Table exists, so query it
-            unprocessable_query = f"""
-            SELECT COALESCE(SUM(vl_pago), 0) AS sum_unprocessable_vl_pago
-            FROM `{full_unprocessable_table}`
-            """
-            query_job = self.bq_client.query(unprocessable_query)
-            result = query_job.result()
-            row = next(result, None)
-            if row:
-                sum_unprocessable_vl_pago = float(row.sum_unprocessable_vl_pago or 0.0)
-        except NotFound:
-            # If table doesn't exist, assume sum is 0
-            sum_unprocessable_vl_pago = 0.0
+        full_processable_table = ensure_full_table_ref(processable_table, self.data_project_id)
+        full_unprocessable_table = ensure_full_table_ref(unprocessable_table, self.data_project_id)
+
+        # If either table doesn't exist, assume its sum is 0
+        unprocessable_sum, processable_sum = sum_vl_pago_by_source(
+            self.bq_client, full_unprocessable_table, full_processable_table
+        )
+        total_vl_pago = processable_sum or 0.0
+        sum_unprocessable_vl_pago = unprocessable_sum or 0.0
 
         # Calculate relative value
         total_sum = total_vl_pago + sum_unprocessable_vl_pago
@@ -164,29 +125,36 @@ class ProcessableBaseHandler(Handler):
         labels["partner"] = str(partner_value)
 
         # Parse timestamp
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
 
-        # Emit metric representing total value of processable claims
-        emit_gauge_metric(
-            monitoring_client=self.monitoring_client,
-            project_id=self.run_project_id,
-            name="claims/pipeline/processable/vl_pago/total",
-            value=total_vl_pago,
-            labels=labels,
-            timestamp=source_timestamp,
-        )
+        # Metric representing total value of processable claims
+        time_series = [
+            build_gauge_time_series(
+                project_id=self.run_project_id,
+                name="claims/pipeline/processable/vl_pago/total",
+                value=total_vl_pago,
+                labels=labels,
+                timestamp=source_timestamp,
+            )
+        ]
 
-        # Emit metric representing relative value of processable claims
+        # Metric representing relative value of processable claims
         # Only emit relative metric if at least one table exists (total_sum > 0)
         # If both tables don't exist (both sums are 0), skip relative metric
         if total_sum > 0:
-            emit_gauge_metric(
-                monitoring_client=self.monitoring_client,
-                project_id=self.run_project_id,
-                name="claims/pipeline/processable/vl_pago/relative",
-                value=relative_vl_pago,
-                labels=labels,
-                timestamp=source_timestamp,
+            time_series.append(
+                build_gauge_time_series(
+                    project_id=self.run_project_id,
+                    name="claims/pipeline/processable/vl_pago/relative",
+                    value=relative_vl_pago,
+                    labels=labels,
+                    timestamp=source_timestamp,
+                )
             )
+
+        # Write both metrics with a single CreateTimeSeries request
+        emit_time_series(
+            monitoring_client=self.monitoring_client,
+            project_id=self.run_project_id,
+            time_series=time_series,
+        )
@@ -20,6 +20,8 @@ class ProvidersVolumeRatioApprovalHandler(ProvidersVolumeRatioBaseHandler):
     the approval pipeline execution.
     """
 
+    MATCH_KEY = ("pipesv2_approval", "COMPLETED")
+
     def __init__(
         self,
         monitoring_client: monitoring_v3.MetricServiceClient,
@@ -56,7 +58,7 @@ class ProvidersVolumeRatioApprovalHandler(ProvidersVolumeRatioBaseHandler):
         pipeline_uuid = pl.get("pipeline_uuid")
         pipeline_status = pl.get("status")
 
-        return pipeline_uuid == "pipesv2_approval" and pipeline_status == "COMPLETED"
+        return (pipeline_uuid, pipeline_status) == self.MATCH_KEY
 
     def handle(self, decoded_message: dict) -> None:
         """
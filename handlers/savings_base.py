@@ -4,12 +4,15 @@ This module contains the base class for handlers that calculate and emit
 savings metrics grouped by agent_id from pipeline completion events.
 """
 
-from datetime import datetime
-
 from google.api_core.exceptions import NotFound
 from google.cloud import bigquery, monitoring_v3
 
-from handlers.base import Handler, HandlerBadRequestError
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+)
 from metrics import emit_gauge_metric
 
 
@@ -90,15 +93,10 @@ class SavingsBaseHandler(Handler):
             raise HandlerBadRequestError("Missing required 'partner' variable in payload.")
 
         # Ensure fully-qualified table path
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
-        full_savings_table = ensure_full_table_ref(savings_table)
+        full_savings_table = ensure_full_table_ref(savings_table, self.data_project_id)
 
         # Parse timestamp
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
 
         # Query BigQuery to get sum and count of vl_glosa_arvo grouped by agent_id
         # If table doesn't exist, don't emit any metrics
@@ -21,6 +21,8 @@ class SavingsEvaluationHandler(SavingsBaseHandler):
     of the financial impact of savings per agent during the evaluation pipeline execution.
     """
 
+    MATCH_KEY = ("pipesv2_evaluation", "COMPLETED")
+
     def __init__(
         self,
         monitoring_client: monitoring_v3.MetricServiceClient,
@@ -57,7 +59,7 @@ class SavingsEvaluationHandler(SavingsBaseHandler):
         pipeline_uuid = payload.get("pipeline_uuid")
         pipeline_status = payload.get("status")
 
-        return pipeline_uuid == "pipesv2_evaluation" and pipeline_status == "COMPLETED"
+        return (pipeline_uuid, pipeline_status) == self.MATCH_KEY
 
     def handle(self, decoded_message: dict) -> None:
         """
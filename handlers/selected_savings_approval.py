@@ -6,12 +6,15 @@ BigQuery to aggregate savings values grouped by agent_id and emits metrics
 that track the total value of savings per agent.
 """
 
-from datetime import datetime
-
 from google.api_core.exceptions import NotFound
 from google.cloud import bigquery, monitoring_v3
 
-from handlers.base import Handler, HandlerBadRequestError
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+)
 from metrics import emit_gauge_metric
 
 
@@ -25,6 +28,8 @@ class SelectedSavingsApprovalHandler(Handler):
     of the financial impact of savings per agent during the approval pipeline execution.
     """
 
+    MATCH_KEY = ("pipesv2_approval", "COMPLETED")
+
     def __init__(
         self,
         monitoring_client: monitoring_v3.MetricServiceClient,
@@ -64,7 +69,7 @@ class SelectedSavingsApprovalHandler(Handler):
         pipeline_uuid = pl.get("pipeline_uuid")
         pipeline_status = pl.get("status")
 
-        return pipeline_uuid == "pipesv2_approval" and pipeline_status == "COMPLETED"
+        return (pipeline_uuid, pipeline_status) == self.MATCH_KEY
 
     def handle(self, decoded_message: dict) -> None:
         """
@@ -109,16 +114,10 @@ class SelectedSavingsApprovalHandler(Handler):
             raise HandlerBadRequestError("Missing required 'partner' variable in payload.")
 
         # Ensure fully-qualified table path
-        full_table = (
-            selected_savings_table
-            if "." in selected_savings_table
-            else f"{self.data_project_id}.{selected_savings_table}"
-        )
+        full_table = ensure_full_table_ref(selected_savings_table, self.data_project_id)
 
         # Parse timestamp
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
 
         # Query BigQuery to get sum of vl_glosa_arvo grouped by agent_id
         # If table doesn't exist, don't emit any metrics
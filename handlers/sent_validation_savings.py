@@ -5,12 +5,17 @@ validation pipeline (internal + manual validation) and were successfully
 submitted, excluding items with filtered_reason = 'SHARED_ID_FATURA'.
 """
 
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, timedelta
 
 from google.cloud import bigquery, monitoring_v3
 from google.cloud.bigquery import QueryJobConfig, ScalarQueryParameter
 
-from handlers.base import Handler, HandlerBadRequestError
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+)
 from metrics import emit_gauge_metric
 
 
@@ -46,6 +51,8 @@ class SentValidationSavingsHandler(Handler):
     point with value 1.0 and status=SUBMITTED_SUCCESS.
     """
 
+    MATCH_KEY = ("pipesv2_submission", "COMPLETED")
+
     def __init__(
         self,
         monitoring_client: monitoring_v3.MetricServiceClient,
@@ -89,7 +96,7 @@ class SentValidationSavingsHandler(Handler):
         pipeline_uuid = payload.get("pipeline_uuid")
         pipeline_status = payload.get("status")
 
-        return pipeline_uuid == "pipesv2_submission" and pipeline_status == "COMPLETED"
+        return (pipeline_uuid, pipeline_status) == self.MATCH_KEY
 
     def handle(self, decoded_message: dict) -> None:
         """
@@ -133,17 +140,14 @@ class SentValidationSavingsHandler(Handler):
             )
 
         # Ensure fully-qualified table paths
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
-        full_internal = ensure_full_table_ref(internal_validation_output_table)
-        full_manual = ensure_full_table_ref(manual_validation_output_table)
-        full_submitted = ensure_full_table_ref(submitted_claims_output_table)
+        full_internal = ensure_full_table_ref(
+            internal_validation_output_table, self.data_project_id
+        )
+        full_manual = ensure_full_table_ref(manual_validation_output_table, self.data_project_id)
+        full_submitted = ensure_full_table_ref(submitted_claims_output_table, self.data_project_id)
 
         # Parse timestamp
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
 
         # The fallback timestamp if there are no submitted claims for the submission_run_id
         twenty_minutes_ago = source_timestamp - timedelta(minutes=20)
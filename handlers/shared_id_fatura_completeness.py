@@ -5,12 +5,17 @@ This handler checks that 100% of savings in the validation pipeline
 were submitted to the partner.
 """
 
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, timedelta
 
 from google.cloud import bigquery, monitoring_v3
 from google.cloud.bigquery import QueryJobConfig, ScalarQueryParameter
 
-from handlers.base import Handler, HandlerBadRequestError
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+)
 from metrics import emit_gauge_metric
 
 
@@ -42,6 +47,8 @@ class SharedIdFaturaCompletenessHandler(Handler):
         Value: 0.0-1.0 (1.0 = 100% complete, i.e., all SHARED_ID_FATURA items submitted)
     """
 
+    MATCH_KEY = ("pipesv2_submission", "COMPLETED")
+
     def __init__(
         self,
         monitoring_client: monitoring_v3.MetricServiceClient,
@@ -85,7 +92,7 @@ class SharedIdFaturaCompletenessHandler(Handler):
         pipeline_uuid = payload.get("pipeline_uuid")
         pipeline_status = payload.get("status")
 
-        return pipeline_uuid == "pipesv2_submission" and pipeline_status == "COMPLETED"
+        return (pipeline_uuid, pipeline_status) == self.MATCH_KEY
 
     def handle(self, decoded_message: dict) -> None:
         """
@@ -130,17 +137,14 @@ class SharedIdFaturaCompletenessHandler(Handler):
             )
 
         # Ensure fully-qualified table paths
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
-        full_internal = ensure_full_table_ref(internal_validation_output_table)
-        full_manual = ensure_full_table_ref(manual_validation_output_table)
-        full_submitted = ensure_full_table_ref(submitted_claims_output_table)
+        full_internal = ensure_full_table_ref(
+            internal_validation_output_table, self.data_project_id
+        )
+        full_manual = ensure_full_table_ref(manual_validation_output_table, self.data_project_id)
+        full_submitted = ensure_full_table_ref(submitted_claims_output_table, self.data_project_id)
 
         # Parse timestamp
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
 
         # The fallback timestamp if there are no submitted claims for the submission_run_id
         twenty_minutes_ago = source_timestamp - timedelta(minutes=20)
@@ -1,10 +1,15 @@
 """Handler for calculating and emitting unsent claims metrics."""
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 from google.cloud import bigquery, monitoring_v3
 
-from handlers.base import Handler, HandlerBadRequestError
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+)
 from metrics import emit_gauge_metric
 
 
@@ -27,6 +32,8 @@ class UnsentClaimsHandler(Handler):
     source_timestamp minus 20 minutes.
     """
 
+    MATCH_KEY = ("pipesv2_submission", "COMPLETED")
+
     def __init__(
         self,
         monitoring_client: monitoring_v3.MetricServiceClient,
@@ -71,7 +78,7 @@ class UnsentClaimsHandler(Handler):
         pipeline_uuid = payload.get("pipeline_uuid")
         pipeline_status = payload.get("status")
 
-        return pipeline_uuid == "pipesv2_submission" and pipeline_status == "COMPLETED"
+        return (pipeline_uuid, pipeline_status) == self.MATCH_KEY
 
     def handle(self, decoded_message: dict) -> None:
         """
@@ -123,25 +130,24 @@ class UnsentClaimsHandler(Handler):
             )
 
         # Ensure fully-qualified table paths
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
         full_processable_claims_historical_table = ensure_full_table_ref(
-            processable_claims_historical_table
+            processable_claims_historical_table, self.data_project_id
         )
         full_unprocessable_claims_historical_table = ensure_full_table_ref(
-            unprocessable_claims_historical_table
+            unprocessable_claims_historical_table, self.data_project_id
         )
         full_internal_validation_output_table = ensure_full_table_ref(
-            internal_validation_output_table
+            internal_validation_output_table, self.data_project_id
+        )
+        full_manual_validation_output_table = ensure_full_table_ref(
+            manual_validation_output_table, self.data_project_id
+        )
+        full_submitted_claims_output_table = ensure_full_table_ref(
+            submitted_claims_output_table, self.data_project_id
         )
-        full_manual_validation_output_table = ensure_full_table_ref(manual_validation_output_table)
-        full_submitted_claims_output_table = ensure_full_table_ref(submitted_claims_output_table)
 
         # Parse timestamp
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
 
         # The fallback timestamp if there are no submitted claims for the submission_run_id
         twenty_minutes_ago_str = (source_timestamp - timedelta(minutes=20)).isoformat()
@@ -1,11 +1,16 @@
 """Handler for calculating and emitting unsent savings metrics."""
 
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, timedelta
 
 from google.cloud import bigquery, monitoring_v3
 from google.cloud.bigquery import QueryJobConfig, ScalarQueryParameter
 
-from handlers.base import Handler, HandlerBadRequestError
+from handlers.base import (
+    Handler,
+    HandlerBadRequestError,
+    ensure_full_table_ref,
+    parse_source_timestamp,
+)
 from metrics import emit_gauge_metric
 
 
@@ -33,6 +38,8 @@ class UnsentSavingsHandler(Handler):
     value 1.0 and status=SUBMITTED_SUCCESS.
     """
 
+    MATCH_KEY = ("pipesv2_submission", "COMPLETED")
+
     def __init__(
         self,
         monitoring_client: monitoring_v3.MetricServiceClient,
@@ -77,7 +84,7 @@ class UnsentSavingsHandler(Handler):
         pipeline_uuid = payload.get("pipeline_uuid")
         pipeline_status = payload.get("status")
 
-        return pipeline_uuid == "pipesv2_submission" and pipeline_status == "COMPLETED"
+        return (pipeline_uuid, pipeline_status) == self.MATCH_KEY
 
     def handle(self, decoded_message: dict) -> None:
         """
@@ -119,22 +126,21 @@ class UnsentSavingsHandler(Handler):
             )
 
         # Ensure fully-qualified table paths
-        def ensure_full_table_ref(table: str) -> str:
-            return table if "." in table else f"{self.data_project_id}.{table}"
-
         full_selected_savings_historical_table = ensure_full_table_ref(
-            selected_savings_historical_table
+            selected_savings_historical_table, self.data_project_id
         )
         full_internal_validation_output_table = ensure_full_table_ref(
-            internal_validation_output_table
+            internal_validation_output_table, self.data_project_id
+        )
+        full_manual_validation_output_table = ensure_full_table_ref(
+            manual_validation_output_table, self.data_project_id
+        )
+        full_submitted_claims_output_table = ensure_full_table_ref(
+            submitted_claims_output_table, self.data_project_id
         )
-        full_manual_validation_output_table = ensure_full_table_ref(manual_validation_output_table)
-        full_submitted_claims_output_table = ensure_full_table_ref(submitted_claims_output_table)
 
         # Parse timestamp
-        source_timestamp = datetime.fromisoformat(
-            decoded_message["source_timestamp"].replace("Z", "+00:00")
-        )
+        source_timestamp = parse_source_timestamp(decoded_message)
 
         # The fallback timestamp if there are no submitted claims for the submission_run_id
         twenty_minutes_ago = source_timestamp - timedelta(minutes=20)
@@ -7,7 +7,7 @@ from cloudevents.http import CloudEvent
 from flask import make_response
 
 from bigquery import create_bigquery_client
-from config import Config
+from config import Config, get_config
 from dispatcher import HandlerDispatcher
 from handlers.beneficiaries_volume_ratio_approval import BeneficiariesVolumeRatioApprovalHandler
 from handlers.beneficiaries_volume_ratio_wrangling import BeneficiariesVolumeRatioWranglingHandler
@@ -117,24 +117,28 @@ def create_handlers(
             bq_client=bq_client,
             run_project_id=config.cloud_run_project_id,
             data_project_id=config.bigquery_project_id,
+            historical_partition_column=config.historical_partition_column,
         ),
         NewProvidersWranglingHandler(
             monitoring_client=monitoring_client,
             bq_client=bq_client,
             run_project_id=config.cloud_run_project_id,
             data_project_id=config.bigquery_project_id,
+            historical_partition_column=config.historical_partition_column,
         ),
         NewBeneficiariesApprovalHandler(
             monitoring_client=monitoring_client,
             bq_client=bq_client,
             run_project_id=config.cloud_run_project_id,
             data_project_id=config.bigquery_project_id,
+            historical_partition_column=config.historical_partition_column,
         ),
         NewBeneficiariesWranglingHandler(
             monitoring_client=monitoring_client,
             bq_client=bq_client,
             run_project_id=config.cloud_run_project_id,
             data_project_id=config.bigquery_project_id,
+            historical_partition_column=config.historical_partition_column,
         ),
         UnsentClaimsHandler(
             monitoring_client=monitoring_client,
@@ -214,7 +218,7 @@ def handle_cloud_event(cloud_event: CloudEvent):
 
     # Initialize on first request (happens after fork in each worker)
     if _dispatcher is None:
-        config = Config()
+        config = get_config()
         monitoring_client = create_monitoring_client(config)
         bq_client = create_bigquery_client(config)
         handlers = create_handlers(monitoring_client, bq_client, config)
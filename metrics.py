@@ -2,6 +2,7 @@
 
 import json
 import logging
+import threading
 from datetime import datetime
 
 from google.cloud import monitoring_v3
@@ -9,32 +10,37 @@ from google.cloud.monitoring_v3 import Point, TimeSeries
 
 from config import Config
 
+# Cloud Monitoring accepts at most this many time series per CreateTimeSeries request
+MAX_TIME_SERIES_PER_REQUEST = 200
 
-def emit_gauge_metric(
+# Monitoring clients are cached per mode so every dispatch reuses the same gRPC channel
+_monitoring_clients: dict[bool, monitoring_v3.MetricServiceClient] = {}
+_monitoring_clients_lock = threading.Lock()
+
+
+def build_gauge_time_series(
     *,
-    monitoring_client: monitoring_v3.MetricServiceClient,
     project_id: str,
     name: str,
     value: float,
     labels: dict,
     timestamp: datetime,
-) -> None:
+) -> TimeSeries:
     """
-    Emit a GAUGE metric to GCP Cloud Monitoring or log it (local mode).
+    Build a GAUGE time series with a single point, without sending it.
 
     Args:
-        monitoring_client: GCP Monitoring client (may be monkey-patched for local mode)
         project_id: Project ID for metric emission
         name: Metric name
         value: Metric value
         labels: Metric labels
         timestamp: Metric timestamp
-    """
-    metric_type = f"custom.googleapis.com/{name}"
-    project_name = f"projects/{project_id}"
 
+    Returns:
+        TimeSeries ready to be written with create_time_series
+    """
     series = TimeSeries()
-    series.metric.type = metric_type
+    series.metric.type = f"custom.googleapis.com/{name}"
     series.metric.labels.update(labels)
     series.resource.type = "global"
     series.resource.labels["project_id"] = project_id
@@ -44,9 +50,67 @@ def emit_gauge_metric(
     point.interval.end_time = timestamp.isoformat()
     series.points = [point]
 
+    return series
+
+
+def emit_time_series(
+    *,
+    monitoring_client: monitoring_v3.MetricServiceClient,
+    project_id: str,
+    time_series: list[TimeSeries],
+) -> None:
+    """
+    Write several time series with as few CreateTimeSeries requests as possible.
+
+    Series are sent in batches of up to MAX_TIME_SERIES_PER_REQUEST. Cloud Monitoring
+    rejects a request that writes the same series twice, so callers must not pass
+    duplicates.
+
+    Args:
+        monitoring_client: GCP Monitoring client (may be monkey-patched for local mode)
+        project_id: Project ID for metric emission
+        time_series: Time series to write, e.g. built with build_gauge_time_series
+    """
+    project_name = f"projects/{project_id}"
+
+    for start in range(0, len(time_series), MAX_TIME_SERIES_PER_REQUEST):
+        monitoring_client.create_time_series(
+            name=project_name,
+            time_series=time_series[start : start + MAX_TIME_SERIES_PER_REQUEST],
+        )
+
+
+def emit_gauge_metric(
+    *,
+    monitoring_client: monitoring_v3.MetricServiceClient,
+    project_id: str,
+    name: str,
+    value: float,
+    labels: dict,
+    timestamp: datetime,
+) -> None:
+    """
+    Emit a GAUGE metric to GCP Cloud Monitoring or log it (local mode).
+
+    Args:
+        monitoring_client: GCP Monitoring client (may be monkey-patched for local mode)
+        project_id: Project ID for metric emission
+        name: Metric name
+        value: Metric value
+        labels: Metric labels
+        timestamp: Metric timestamp
+    """
+    series = build_gauge_time_series(
+        project_id=project_id,
+        name=name,
+        value=value,
+        labels=labels,
+        timestamp=timestamp,
+    )
+
     # In local mode, monitoring_client.create_time_series is monkey-patched to log
     # In production mode, it's the real method
-    monitoring_client.create_time_series(name=project_name, time_series=[series])
+    monitoring_client.create_time_series(name=f"projects/{project_id}", time_series=[series])
 
 
 def _create_logging_monitoring_client() -> monitoring_v3.MetricServiceClient:
@@ -103,6 +167,7 @@ def create_monitoring_client(config: Config) -> monitoring_v3.MetricServiceClien
 
     In local mode, returns a client with monkey-patched methods that log.
     In production mode, returns a standard GCP Monitoring client.
+    Clients are cached per mode, so repeated calls return the same instance.
 
     Args:
         config: Application configuration
@@ -110,9 +175,21 @@ def create_monitoring_client(config: Config) -> monitoring_v3.MetricServiceClien
     Returns:
         Monitoring client instance
     """
-    if config.local_mode:
-        return _create_logging_monitoring_client()
-    return monitoring_v3.MetricServiceClient()
+    with _monitoring_clients_lock:
+        client = _monitoring_clients.get(config.local_mode)
+        if client is None:
+            if config.local_mode:
+                client = _create_logging_monitoring_client()
+            else:
+                client = monitoring_v3.MetricServiceClient()
+            _monitoring_clients[config.local_mode] = client
+
+    return client
 
 
-__all__ = ["emit_gauge_metric", "create_monitoring_client"]
+__all__ = [
+    "build_gauge_time_series",
+    "emit_gauge_metric",
+    "emit_time_series",
+    "create_monitoring_client",
+]
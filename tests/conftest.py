@@ -7,6 +7,21 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 from testcontainers.core.container import DockerContainer
 
 
+@pytest.fixture(autouse=True)
+def clear_bigquery_caches():
+    """
+    Fixture that clears process-wide BigQuery caches around each test.
+
+    Tests create and drop tables with the same names, so cached table existence
+    results must not leak from one test into the next.
+    """
+    from bigquery import clear_table_exists_cache
+
+    clear_table_exists_cache()
+    yield
+    clear_table_exists_cache()
+
+
 @pytest.fixture(scope="session")
 def bigquery_emulator():
     """
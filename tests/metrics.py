@@ -45,3 +45,31 @@ def assert_metrics_emitted(mock_monitoring_client, expected_calls: list) -> None
             f"Expected call not found: name={expected_name}, "
             f"time_series={expected_time_series_matcher}"
         )
+
+
+def assert_metrics_batch_emitted(mock_monitoring_client, expected_calls: list) -> None:
+    """Assert that the expected metrics were written together in a single request.
+
+    The request must hold exactly one time series per expected call, each matching
+    its MetricMatcher.
+    """
+    actual_calls = mock_monitoring_client.create_time_series.call_args_list
+    assert len(actual_calls) == 1, f"Expected a single request, got {len(actual_calls)}"
+
+    actual_name = actual_calls[0].kwargs.get("name")
+    actual_time_series = list(actual_calls[0].kwargs.get("time_series", []))
+    expected_count = len(expected_calls)
+    actual_count = len(actual_time_series)
+    assert actual_count == expected_count, f"Expected {expected_count} series, got {actual_count}"
+
+    for expected_call in expected_calls:
+        expected_name = expected_call.kwargs["name"]
+        expected_time_series_matcher = expected_call.kwargs["time_series"]
+
+        found = actual_name == expected_name and any(
+            expected_time_series_matcher == [ts] for ts in actual_time_series
+        )
+        assert found, (
+            f"Expected time series not found: name={expected_name}, "
+            f"time_series={expected_time_series_matcher}"
+        )
@@ -0,0 +1,45 @@
+"""Tests for shared handler helpers."""
+
+import pytest
+
+from config import Config
+from handlers.base import HandlerBadRequestError, require_variables
+from main import create_handlers
+
+
+def test_require_variables_returns_values_in_order():
+    """Test that required variables are returned in the requested order."""
+    variables = {"a": "table_a", "b": "table_b", "partner": "p"}
+
+    assert require_variables(variables, "b", "a") == ["table_b", "table_a"]
+
+
+def test_require_variables_reports_all_missing_variables():
+    """Test that one error names every missing or empty variable."""
+    with pytest.raises(HandlerBadRequestError) as exc_info:
+        require_variables({"a": "table_a", "b": ""}, "a", "b", "c")
+
+    assert exc_info.value.message == "No variables 'b', 'c' found in payload."
+
+
+def test_require_variables_single_missing_variable_message():
+    """Test that a single missing variable keeps the singular message."""
+    with pytest.raises(HandlerBadRequestError) as exc_info:
+        require_variables({}, "a")
+
+    assert exc_info.value.message == "No variable 'a' found in payload."
+
+
+def test_keyed_handlers_match_events_with_their_match_key(mocker):
+    """Test that every keyed handler's match() accepts an event carrying its MATCH_KEY."""
+    handlers = create_handlers(mocker.MagicMock(), mocker.MagicMock(), Config())
+    keyed_handlers = [handler for handler in handlers if handler.match_key() is not None]
+
+    assert keyed_handlers
+    for handler in keyed_handlers:
+        pipeline_uuid, status = handler.match_key()
+        event = {
+            "source_timestamp": "2024-01-15T10:30:00Z",
+            "payload": {"pipeline_uuid": pipeline_uuid, "status": status, "variables": {}},
+        }
+        assert handler.match(event), type(handler).__name__
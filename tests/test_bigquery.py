@@ -2,6 +2,7 @@
 
 import pytest
 from google.cloud import bigquery
+from pytest_mock import MockerFixture
 
 
 @pytest.mark.integration
@@ -70,3 +71,184 @@ def test_bigquery_table_creation(bigquery_client):
     finally:
         # Clean up
         bigquery_client.delete_dataset(dataset_id, delete_contents=True, not_found_ok=True)
+
+
+def test_create_bigquery_client_reuses_client_per_config(mocker: MockerFixture):
+    """Test that equivalent configs share one cached client and close_clients resets it."""
+    import bigquery as bigquery_factory
+    from config import Config
+
+    mock_client_class = mocker.patch.object(
+        bigquery_factory.bigquery, "Client", side_effect=lambda **kwargs: mocker.MagicMock()
+    )
+    bigquery_factory.close_clients()
+
+    try:
+        config = Config(local_mode=False, bigquery_project_id="project-a")
+        first = bigquery_factory.create_bigquery_client(config)
+        second = bigquery_factory.create_bigquery_client(
+            Config(local_mode=False, bigquery_project_id="project-a")
+        )
+        other = bigquery_factory.create_bigquery_client(
+            Config(local_mode=False, bigquery_project_id="project-b")
+        )
+
+        assert first is second
+        assert other is not first
+        assert mock_client_class.call_count == 2
+
+        bigquery_factory.close_clients()
+        first.close.assert_called_once()
+        other.close.assert_called_once()
+
+        third = bigquery_factory.create_bigquery_client(config)
+        assert third is not first
+    finally:
+        bigquery_factory.close_clients()
+
+
+def test_table_exists_caches_existing_and_missing_tables(mocker: MockerFixture):
+    """Test that existence results are cached until forgotten or expired."""
+    from google.api_core.exceptions import NotFound
+
+    from bigquery import forget_tables, table_exists
+
+    def get_table(table_ref):
+        if table_ref != "project.dataset.present":
+            raise NotFound("missing")
+        return mocker.MagicMock()
+
+    client = mocker.MagicMock()
+    client.get_table.side_effect = get_table
+
+    assert table_exists(client, "project.dataset.present") is True
+    assert table_exists(client, "project.dataset.present") is True
+    assert client.get_table.call_count == 1
+
+    assert table_exists(client, "project.dataset.missing") is False
+    assert table_exists(client, "project.dataset.missing") is False
+    assert client.get_table.call_count == 2
+
+    forget_tables(client, "project.dataset.present")
+    assert table_exists(client, "project.dataset.present") is True
+    assert client.get_table.call_count == 3
+
+    # Missing tables expire after the shorter not-found TTL
+    mocker.patch("bigquery.TABLE_NOT_FOUND_CACHE_TTL_SECONDS", 0.0)
+    forget_tables(client, "project.dataset.missing")
+    assert table_exists(client, "project.dataset.missing") is False
+    assert table_exists(client, "project.dataset.missing") is False
+    assert client.get_table.call_count == 5
+
+
+def test_tables_exist_preserves_order(mocker: MockerFixture):
+    """Test that concurrent probes return existence flags in request order."""
+    from google.api_core.exceptions import NotFound
+
+    from bigquery import tables_exist
+
+    def get_table(table_ref):
+        if table_ref.endswith("missing"):
+            raise NotFound("missing")
+        return mocker.MagicMock()
+
+    client = mocker.MagicMock()
+    client.get_table.side_effect = get_table
+
+    assert tables_exist(client, ["p.d.a", "p.d.missing", "p.d.b", "p.d.other_missing"]) == [
+        True,
+        False,
+        True,
+        False,
+    ]
+
+
+def test_query_if_tables_exist_names_missing_required_tables(mocker: MockerFixture):
+    """Test that missing required tables are named and missing optional ones skip the query."""
+    from google.api_core.exceptions import NotFound
+
+    from bigquery import MissingTablesError, query_if_tables_exist
+
+    def get_table(table_ref):
+        if table_ref.endswith("missing"):
+            raise NotFound("missing")
+        return mocker.MagicMock()
+
+    client = mocker.MagicMock()
+    client.get_table.side_effect = get_table
+
+    with pytest.raises(MissingTablesError) as exc_info:
+        query_if_tables_exist(
+            client, "SELECT 1", required_tables=["p.d.batch", "p.d.batch_missing"]
+        )
+    assert exc_info.value.table_refs == ["p.d.batch_missing"]
+
+    result = query_if_tables_exist(
+        client,
+        "SELECT 1",
+        required_tables=["p.d.batch"],
+        optional_tables=["p.d.historical_missing"],
+    )
+    assert result is None
+    client.query_and_wait.assert_not_called()
+
+
+def test_query_if_tables_exist_reprobes_after_stale_cache(mocker: MockerFixture):
+    """Test that a table dropped after being cached as existing is found by a new probe."""
+    from google.api_core.exceptions import NotFound
+
+    from bigquery import MissingTablesError, query_if_tables_exist, tables_exist
+
+    dropped = set()
+
+    def get_table(table_ref):
+        if table_ref in dropped:
+            raise NotFound("missing")
+        return mocker.MagicMock()
+
+    client = mocker.MagicMock()
+    client.get_table.side_effect = get_table
+    client.query_and_wait.side_effect = NotFound("missing")
+    tables_exist(client, ["p.d.batch", "p.d.historical"])
+
+    # A stale optional table skips the query
+    dropped.add("p.d.historical")
+    result = query_if_tables_exist(
+        client, "SELECT 1", required_tables=["p.d.batch"], optional_tables=["p.d.historical"]
+    )
+    assert result is None
+
+    # A stale required table is named in the error
+    dropped.add("p.d.batch")
+    with pytest.raises(MissingTablesError) as exc_info:
+        query_if_tables_exist(client, "SELECT 1", required_tables=["p.d.batch"])
+    assert exc_info.value.table_refs == ["p.d.batch"]
+
+
+def test_sum_vl_pago_by_source_recovers_from_stale_existence_cache(mocker: MockerFixture):
+    """Test that a table dropped after being cached as existing is re-probed and skipped."""
+    from types import SimpleNamespace
+
+    from google.api_core.exceptions import NotFound
+
+    from bigquery import sum_vl_pago_by_source, tables_exist
+
+    dropped = set()
+
+    def get_table(table_ref):
+        if table_ref in dropped:
+            raise NotFound("missing")
+        return mocker.MagicMock()
+
+    client = mocker.MagicMock()
+    client.get_table.side_effect = get_table
+    client.query_and_wait.side_effect = [
+        NotFound("missing"),
+        iter([SimpleNamespace(sum_unprocessable_vl_pago=10, sum_processable_vl_pago=0)]),
+    ]
+    tables_exist(client, ["p.d.unprocessable", "p.d.processable"])
+    dropped.add("p.d.processable")
+
+    assert sum_vl_pago_by_source(client, "p.d.unprocessable", "p.d.processable") == (10.0, None)
+    retried_query = client.query_and_wait.call_args_list[1].args[0]
+    assert "p.d.processable" not in retried_query
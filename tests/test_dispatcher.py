@@ -1,6 +1,12 @@
 """Tests for HandlerDispatcher."""
 
-from dispatcher import HandlerDispatcher
+import base64
+import json
+import logging
+
+from cloudevents.http import CloudEvent
+
+from dispatcher import HandlerDispatcher, decode_message
 from handlers.base import Handler
 
 
@@ -142,3 +148,162 @@ def test_dispatcher_handler_error(mock_monitoring_client, sample_cloud_event, fl
     ts = time_series_list[0]
     assert ts.metric.type == "custom.googleapis.com/handler_execution_failure"
     assert dict(ts.metric.labels) == {"handler_class": "MockHandler"}
+
+
+class KeyedMockHandler(MockHandler):
+    """Mock handler declaring a match key and recording match() calls."""
+
+    def __init__(self, name, key, should_match=True):
+        super().__init__(name, should_match=should_match)
+        self.key = key
+        self.match_calls = 0
+
+    def match(self, decoded_message: dict) -> bool:
+        """Match handler and record the call."""
+        self.match_calls += 1
+        return super().match(decoded_message)
+
+    def match_key(self) -> tuple[str, str]:
+        """Return the configured match key."""
+        return self.key
+
+
+def test_dispatcher_skips_handlers_with_other_match_key(
+    mock_monitoring_client, sample_cloud_event, flask_app
+):
+    """Test that handlers keyed on another pipeline are not matched, unkeyed ones always are."""
+    # Arrange
+    keyed_handler = KeyedMockHandler("Keyed", ("test_pipeline_123", "COMPLETED"))
+    other_handler = KeyedMockHandler("Other", ("other_pipeline", "COMPLETED"))
+    other_handler.should_raise = RuntimeError("Should never be handled")
+    unkeyed_handler = MockHandler("Unkeyed", should_match=True)
+
+    dispatcher = HandlerDispatcher(
+        handlers=[keyed_handler, other_handler, unkeyed_handler],
+        monitoring_client=mock_monitoring_client,
+        project_id="test-project",
+    )
+
+    # Act
+    response = dispatcher.dispatch(sample_cloud_event)
+
+    # Assert
+    status_code = response[1] if isinstance(response, tuple) else response.status_code
+    assert status_code == 204
+    assert keyed_handler.match_calls == 1
+    assert other_handler.match_calls == 0
+    mock_monitoring_client.create_time_series.assert_not_called()
+
+
+def test_dispatcher_ignores_non_string_match_key_values(mock_monitoring_client, flask_app):
+    """Test that an unhashable pipeline_uuid only reaches handlers without a match key."""
+    # Arrange
+    keyed_handler = KeyedMockHandler("Keyed", ("test_pipeline_123", "COMPLETED"))
+    unkeyed_handler = MockHandler("Unkeyed", should_match=True)
+    payload = {
+        "source_timestamp": "2024-01-15T10:30:00Z",
+        "payload": {"pipeline_uuid": ["test_pipeline_123"], "status": "COMPLETED"},
+    }
+
+    dispatcher = HandlerDispatcher(
+        handlers=[keyed_handler, unkeyed_handler],
+        monitoring_client=mock_monitoring_client,
+        project_id="test-project",
+    )
+
+    # Act
+    response = dispatcher.dispatch(_pubsub_cloud_event(json.dumps(payload).encode()))
+
+    # Assert
+    status_code = response[1] if isinstance(response, tuple) else response.status_code
+    assert status_code == 204
+    assert keyed_handler.match_calls == 0
+
+
+def _pubsub_cloud_event(raw_data: bytes) -> CloudEvent:
+    """Build a Pub/Sub-style CloudEvent whose message data is the base64 of raw_data."""
+    return CloudEvent(
+        {
+            "type": "google.cloud.pubsub.topic.v1.messagePublished",
+            "source": "//pubsub.googleapis.com/projects/test-project/topics/test-topic",
+            "specversion": "1.0",
+            "id": "test-event-id",
+        },
+        {"message": {"data": base64.b64encode(raw_data).decode("utf-8")}},
+    )
+
+
+def test_decode_message_pubsub_format(sample_cloud_event, sample_pubsub_payload):
+    """Test that base64-encoded Pub/Sub messages are decoded into a dictionary."""
+    assert decode_message(sample_cloud_event) == sample_pubsub_payload
+
+
+def test_decode_message_direct_format(sample_pubsub_payload):
+    """Test that direct payloads are returned as-is and unknown formats decode to None."""
+    attributes = {
+        "type": "test",
+        "source": "test",
+        "specversion": "1.0",
+        "id": "test-event-id",
+    }
+    assert decode_message(CloudEvent(attributes, sample_pubsub_payload)) == sample_pubsub_payload
+    assert decode_message(CloudEvent(attributes, {"message": {}})) is None
+
+
+def test_decode_message_invalid_payload_returns_none():
+    """Test that invalid JSON, invalid UTF-8 or non-object message data decodes to None."""
+    assert decode_message(_pubsub_cloud_event(b"not json")) is None
+    assert decode_message(_pubsub_cloud_event(b"\xff\xfe{")) is None
+    assert decode_message(_pubsub_cloud_event(b"[1, 2]")) is None
+
+
+def test_dispatcher_logs_decoded_message_as_json(
+    mock_monitoring_client, sample_cloud_event, sample_pubsub_payload, flask_app, caplog
+):
+    """Test that the decoded message is logged as JSON when INFO is enabled."""
+    dispatcher = HandlerDispatcher(
+        handlers=[],
+        monitoring_client=mock_monitoring_client,
+        project_id="test-project",
+    )
+
+    with caplog.at_level(logging.INFO):
+        dispatcher.dispatch(sample_cloud_event)
+
+    expected = f"Decoded message: {json.dumps(sample_pubsub_payload, separators=(',', ':'))}"
+    assert expected in caplog.messages
+
+
+def test_dispatcher_batches_failure_metrics(mock_monitoring_client, sample_cloud_event, flask_app):
+    """Test that all failure metrics of a dispatch are written in one request."""
+    # Arrange
+    failing_matcher = FailingMatcherHandler("FailingMatcher")
+    failing_handler = MockHandler(
+        "FailingHandler", should_match=True, should_raise=RuntimeError("Handler failed")
+    )
+
+    dispatcher = HandlerDispatcher(
+        handlers=[failing_matcher, failing_handler],
+        monitoring_client=mock_monitoring_client,
+        project_id="test-project",
+    )
+
+    # Act
+    response = dispatcher.dispatch(sample_cloud_event)
+
+    # Assert
+    status_code = response[1] if isinstance(response, tuple) else response.status_code
+    assert status_code == 500
+
+    mock_monitoring_client.create_time_series.assert_called_once()
+    time_series_list = mock_monitoring_client.create_time_series.call_args.kwargs["time_series"]
+    assert [(ts.metric.type, dict(ts.metric.labels)) for ts in time_series_list] == [
+        (
+            "custom.googleapis.com/handler_matcher_failure",
+            {"handler_class": "FailingMatcherHandler"},
+        ),
+        (
+            "custom.googleapis.com/handler_execution_failure",
+            {"handler_class": "MockHandler"},
+        ),
+    ]
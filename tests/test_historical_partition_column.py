@@ -0,0 +1,72 @@
+"""Tests for the historical partition column filter of the new beneficiaries/providers handlers."""
+
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+
+from handlers.new_beneficiaries_approval import NewBeneficiariesApprovalHandler
+from handlers.new_providers_approval import NewProvidersApprovalHandler
+
+# Both handlers share the same historical window filter
+HANDLER_CLASSES = [NewBeneficiariesApprovalHandler, NewProvidersApprovalHandler]
+
+
+def _approval_event() -> dict:
+    """Create a decoded approval pipeline event with dataset-relative table names."""
+    return {
+        "source_timestamp": "2024-04-15T10:30:00Z",
+        "payload": {
+            "pipeline_uuid": "pipesv2_approval",
+            "status": "COMPLETED",
+            "variables": {
+                "partner": "test_partner",
+                "processable_claims_input_table": "d.batch_processable",
+                "unprocessable_claims_input_table": "d.batch_unprocessable",
+                "processable_claims_output_table": "d.historical_processable",
+                "unprocessable_claims_output_table": "d.historical_unprocessable",
+            },
+        },
+    }
+
+
+@pytest.mark.parametrize("handler_class", HANDLER_CLASSES)
+@pytest.mark.parametrize("column", ["", "1col", "_PARTITIONDATE; DROP TABLE x", "a.b"])
+def test_handler_rejects_invalid_partition_column(
+    mocker: MockerFixture, handler_class: type, column: str
+):
+    """Test that a partition column that is not an identifier is rejected."""
+    with pytest.raises(ValueError, match="Invalid historical partition column"):
+        handler_class(
+            mocker.MagicMock(),
+            mocker.MagicMock(),
+            "run-project",
+            "data-project",
+            historical_partition_column=column,
+        )
+
+
+@pytest.mark.parametrize("handler_class", HANDLER_CLASSES)
+@pytest.mark.parametrize("column", [None, "_PARTITIONDATE"])
+def test_handler_filters_on_partition_column(
+    mocker: MockerFixture, handler_class: type, column: str | None
+):
+    """Test that a configured partition column is filtered on the 3-month window."""
+    bq_client = mocker.MagicMock()
+    bq_client.query_and_wait.return_value = iter([SimpleNamespace(new_pct=0.5)])
+    handler = handler_class(
+        mocker.MagicMock(),
+        bq_client,
+        "run-project",
+        "data-project",
+        historical_partition_column=column,
+    )
+
+    handler.handle(_approval_event())
+
+    query = bq_client.query_and_wait.call_args.args[0]
+    assert query.count("h1.created_at >= @three_months_ago") == 2
+    if column is None:
+        assert "_PARTITIONDATE" not in query
+    else:
+        assert query.count(f"AND h1.{column} >= @three_months_ago") == 2
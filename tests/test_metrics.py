@@ -0,0 +1,24 @@
+"""Tests for metrics utilities."""
+
+from pytest_mock import MockerFixture
+
+import metrics
+from config import Config
+
+
+def test_create_monitoring_client_reuses_client_per_mode(mocker: MockerFixture):
+    """Test that the monitoring client is created once per mode and then reused."""
+    mock_client_class = mocker.patch.object(
+        metrics.monitoring_v3,
+        "MetricServiceClient",
+        side_effect=lambda: mocker.MagicMock(),
+    )
+    mocker.patch.dict(metrics._monitoring_clients, clear=True)
+
+    first = metrics.create_monitoring_client(Config(local_mode=False))
+    second = metrics.create_monitoring_client(Config(local_mode=False))
+    local = metrics.create_monitoring_client(Config(local_mode=True))
+
+    assert first is second
+    assert local is not first
+    assert mock_client_class.call_count == 2
@@ -1,9 +1,13 @@
 """Integration tests for PostFilteredBaseHandler."""
 
+from types import SimpleNamespace
+
 import pytest
 from cloudevents.http import CloudEvent
+from google.api_core.exceptions import NotFound
 from pytest_mock import MockerFixture
 
+from bigquery import table_exists
 from handlers.post_filtered_approval import PostFilteredApprovalHandler
 from handlers.post_filtered_selection import PostFilteredSelectionHandler
 from tests.bigquery import (
@@ -276,3 +280,46 @@ def test_post_filtered_base_handler_with_approval_pipeline(
 
     finally:
         bigquery_client.delete_dataset(dataset_id, delete_contents=True, not_found_ok=True)
+
+
+def test_post_filtered_base_handler_retries_when_excluded_table_was_dropped(
+    mocker: MockerFixture,
+):
+    """Test that an excluded table dropped after being cached as existing counts as 0."""
+    excluded_table = "p.d.excluded_savings"
+    dropped = set()
+
+    def get_table(table_ref):
+        if table_ref in dropped:
+            raise NotFound("missing")
+        return mocker.MagicMock()
+
+    bq_client = mocker.MagicMock()
+    bq_client.get_table.side_effect = get_table
+    bq_client.query_and_wait.side_effect = [
+        NotFound("missing"),
+        iter([SimpleNamespace(total_vl_glosa_arvo=0, sum_savings_vl_glosa_arvo=SAVINGS_TOTAL)]),
+    ]
+    mock_emit = mocker.patch("handlers.post_filtered_base.emit_gauge_metric")
+    table_exists(bq_client, excluded_table)
+    dropped.add(excluded_table)
+
+    handler = PostFilteredApprovalHandler(mocker.MagicMock(), bq_client, "run-project", "p")
+    handler.handle(
+        {
+            "source_timestamp": "2024-01-15T10:30:00Z",
+            "payload": {
+                "pipeline_uuid": "pipesv2_approval",
+                "status": "COMPLETED",
+                "variables": {
+                    "partner": "partner_a",
+                    "excluded_savings_input_table": excluded_table,
+                    "savings_input_table": "p.d.savings",
+                },
+            },
+        }
+    )
+
+    retried_query = bq_client.query_and_wait.call_args_list[1].args[0]
+    assert excluded_table not in retried_query
+    assert [c.kwargs["value"] for c in mock_emit.call_args_list] == [0.0, 0.0]
@@ -12,7 +12,7 @@ from tests.bigquery import (
     create_savings_tables,
 )
 from tests.conftest import assert_response_success
-from tests.metrics import MetricMatcher, assert_metrics_emitted
+from tests.metrics import MetricMatcher, assert_metrics_batch_emitted
 
 # Test data constants
 UNPROCESSABLE_CLAIMS_ROWS = [
@@ -182,7 +182,7 @@ def test_pre_filtered_base_handler_with_approval_pipeline(
         response = dispatch_event(event, [PreFilteredApprovalHandler])
 
         assert_response_success(response)
-        assert_metrics_emitted(mock_monitoring_client, expected_calls)
+        assert_metrics_batch_emitted(mock_monitoring_client, expected_calls)
 
     finally:
         bigquery_client.delete_dataset(dataset_id, delete_contents=True, not_found_ok=True)
@@ -241,7 +241,7 @@ def test_pre_filtered_base_handler_missing_unprocessable_table(
         response = dispatch_event(event, [PreFilteredApprovalHandler])
 
         assert_response_success(response)
-        assert_metrics_emitted(mock_monitoring_client, expected_calls)
+        assert_metrics_batch_emitted(mock_monitoring_client, expected_calls)
 
     finally:
         bigquery_client.delete_dataset(dataset_id, delete_contents=True, not_found_ok=True)
@@ -298,7 +298,7 @@ def test_pre_filtered_base_handler_missing_processable_table(
         response = dispatch_event(event, [PreFilteredApprovalHandler])
 
         assert_response_success(response)
-        assert_metrics_emitted(mock_monitoring_client, expected_calls)
+        assert_metrics_batch_emitted(mock_monitoring_client, expected_calls)
 
     finally:
         bigquery_client.delete_dataset(dataset_id, delete_contents=True, not_found_ok=True)
@@ -355,7 +355,7 @@ def test_pre_filtered_base_handler_with_wrangling_pipeline(
         response = dispatch_event(event, [PreFilteredWranglingHandler])
 
         assert_response_success(response)
-        assert_metrics_emitted(mock_monitoring_client, expected_calls)
+        assert_metrics_batch_emitted(mock_monitoring_client, expected_calls)
 
     finally:
         bigquery_client.delete_dataset(dataset_id, delete_contents=True, not_found_ok=True)